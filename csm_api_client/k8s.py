@@ -25,7 +25,8 @@ Utility functions for interacting with Kubernetes.
 """
 
 import logging
-from typing import Any, Type, TypeVar
+from threading import Lock
+from typing import Any, Dict, Tuple, Type, TypeVar
 
 from kubernetes.client import CoreV1Api
 from kubernetes.config.config_exception import ConfigException
@@ -38,8 +39,12 @@ LOGGER = logging.getLogger(__name__)
 
 T = TypeVar("T")
 
+# Cache of API objects constructed by load_kube_api, keyed by class and kwargs
+_KUBE_API_CACHE: Dict[Tuple, Any] = {}
+_KUBE_API_CACHE_LOCK = Lock()
 
-def load_kube_api(api_cls: Type[T] = CoreV1Api, **kwargs: Any) -> T:
+
+def load_kube_api(api_cls: Type[T] = CoreV1Api, force_reload: bool = False, **kwargs: Any) -> T:
     """Get a Kubernetes CoreV1Api object.
 
     This helper function loads the kubeconfig and then instantiates
@@ -49,12 +54,44 @@ def load_kube_api(api_cls: Type[T] = CoreV1Api, **kwargs: Any) -> T:
     order is the reverse of that in the `kubernetes.config.load_config()`
     helper function.
 
+    The API object is cached, so later calls with the same `api_cls` and
+    keyword arguments return the same object without loading the
+    configuration again. If any keyword argument is not hashable, the API
+    object is constructed without caching it.
+
     Args:
         api_cls: the type of the API object to construct.
+        force_reload: if True, load the configuration and construct a new
+            API object even if one is already cached.
+        **kwargs: keyword arguments to pass to the constructor of `api_cls`.
 
     Returns:
         The API object from the kubernetes library.
 
+    Raises:
+        kubernetes.config.config_exception.ConfigException: if failed to load
+            kubernetes configuration.
+    """
+    try:
+        cache_key = (api_cls, tuple(sorted(kwargs.items())))
+        hash(cache_key)
+    except TypeError:
+        # Keyword arguments which cannot be used as a cache key are still
+        # accepted, but the API object constructed with them is not cached.
+        with _KUBE_API_CACHE_LOCK:
+            _load_kube_config()
+            return api_cls(**kwargs)
+
+    with _KUBE_API_CACHE_LOCK:
+        if force_reload or cache_key not in _KUBE_API_CACHE:
+            _load_kube_config()
+            _KUBE_API_CACHE[cache_key] = api_cls(**kwargs)
+        return _KUBE_API_CACHE[cache_key]
+
+
+def _load_kube_config() -> None:
+    """Load the in-cluster config, falling back to the kubeconfig file.
+
     Raises:
         kubernetes.config.config_exception.ConfigException: if failed to load
             kubernetes configuration.
@@ -73,5 +110,3 @@ def load_kube_api(api_cls: Type[T] = CoreV1Api, **kwargs: Any) -> T:
             raise ConfigException(
                 'Failed to load kubernetes config: {}'.format(err)
             ) from err
-
-    return api_cls(**kwargs)
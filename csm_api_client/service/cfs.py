@@ -25,30 +25,37 @@
 Basic client library for CFS.
 """
 from abc import ABC, abstractmethod
+from concurrent.futures import ThreadPoolExecutor
 import os.path
 from copy import deepcopy
+from contextvars import ContextVar
 from datetime import datetime, timedelta
 from enum import Enum
-from functools import cached_property
+from functools import cached_property, lru_cache
 from itertools import chain
 import json
 import logging
+from operator import attrgetter
 import re
 import shutil
+import stat
 from typing import (
     Any,
     Dict,
+    FrozenSet,
     Generator,
     Iterable,
     List,
     Optional,
+    Set,
+    TYPE_CHECKING,
+    Tuple,
     Type,
     Union
 )
 from urllib.parse import urlparse, urlunparse
 import uuid
 
-from cray_product_catalog.query import ProductCatalog, ProductCatalogError
 # ApiException is not found in the kubernetes.client library
 from kubernetes.client import (
     ApiException,
@@ -62,10 +69,52 @@ from csm_api_client.service.gateway import APIError, APIGatewayClient
 from csm_api_client.service.hsm import HSMClient
 from csm_api_client.service.vcs import VCSError, VCSRepo
 from csm_api_client.session import Session
-from csm_api_client.util import get_val_by_path, pop_val_by_path, set_val_by_path, strip_suffix
+from csm_api_client.util import pop_val_by_path, set_val_by_path
+
+if TYPE_CHECKING:
+    from cray_product_catalog.query import ProductCatalog
 
 LOGGER = logging.getLogger(__name__)
 MAX_BRANCH_NAME_WIDTH = 7
+NUMERIC_SUFFIX_REGEX = re.compile(r'([0-9]+)$')
+LAYER_NAME_TIMESTAMP_FORMAT = '%Y%m%dT%H%M%S'
+# When set, the timestamp used in all generated layer names, so that the layers
+# of a configuration payload get the same timestamp
+_LAYER_NAME_TIMESTAMP: ContextVar[Optional[str]] = ContextVar('_LAYER_NAME_TIMESTAMP', default=None)
+# Commit hashes that branches have been resolved to, keyed by clone URL and branch
+_BRANCH_COMMIT_CACHE: Dict[Tuple[str, str], str] = {}
+# VCS repositories by clone URL, so that the VCS credentials are only read once per repository
+_VCS_REPO_CACHE: Dict[str, VCSRepo] = {}
+
+
+@lru_cache(maxsize=256)
+def _get_repo_path(clone_url: str) -> str:
+    """Get the path portion of a clone URL.
+
+    Many layers across configurations share the same few clone URLs, so each
+    distinct URL is only parsed once.
+    """
+    return urlparse(clone_url).path
+
+
+@lru_cache(maxsize=1)
+def _load_product_catalog() -> 'ProductCatalog':
+    """Load the product catalog from Kubernetes, reusing it once it is loaded.
+
+    Raises:
+        ProductCatalogError: if the product catalog cannot be loaded. Failures
+            are not cached.
+    """
+    from cray_product_catalog.query import ProductCatalog
+    return ProductCatalog()
+
+
+def _extract_numeric_suffix(s: str) -> int:
+    """Get the integer suffix of a string, or 0 if it has no numeric suffix."""
+    match = NUMERIC_SUFFIX_REGEX.search(s)
+    if match is None:
+        return 0
+    return int(match.group(0))
 
 
 class LayerState(Enum):
@@ -107,15 +156,30 @@ class CFSLayerBase(ABC):
     # This gets automatically overwritten in the __init_subclass__ method. It is
     # the reverse mapping from attributes of the class to CFS properties.
     ATTRS_TO_CFS_PROPS: Dict[str, str] = {value: key for key, value in CFS_PROPS_TO_ATTRS.items()}
+    # These also get overwritten in __init_subclass__. They are the pairs of CFS
+    # properties and attributes, and a getter returning all those attributes at once.
+    _PROP_PAIRS: Tuple[Tuple[str, str], ...] = tuple(CFS_PROPS_TO_ATTRS.items())
+    _ATTR_GETTER: 'attrgetter[Tuple]' = attrgetter(*CFS_PROPS_TO_ATTRS.values())
+    # The top-level keys of CFS properties nested in dicts, e.g. 'special_parameters'
+    _NESTED_PROP_PARENTS: FrozenSet[str] = frozenset()
     # These are the attributes that must match for a layer to be considered the same
     # as another layer (apart from the version). Subclasses can add to or override this.
     MATCHING_ATTRS = ['repo_path']
 
+    # Many layers may be created from CFS configurations, so avoid a per-instance
+    # __dict__. A subclass without its own __slots__ gets a __dict__, so subclasses
+    # should declare __slots__ for any attributes they add to keep the saving.
+    __slots__ = ('_clone_url', '_repo_path', '_name', 'commit', 'branch', 'additional_data')
+
     def __init_subclass__(cls, **kwargs: Any) -> None:
         """Sets up class attribute mapping from attributes to CFS properties"""
         super().__init_subclass__(**kwargs)
         # Create the reverse mapping from attributes to CFS properties automatically
         cls.ATTRS_TO_CFS_PROPS = {val: key for key, val in cls.CFS_PROPS_TO_ATTRS.items()}
+        cls._PROP_PAIRS = tuple(cls.CFS_PROPS_TO_ATTRS.items())
+        cls._ATTR_GETTER = attrgetter(*cls.CFS_PROPS_TO_ATTRS.values())
+        cls._NESTED_PROP_PARENTS = frozenset(cfs_prop.split('.', 1)[0]
+                                             for cfs_prop in cls.CFS_PROPS_TO_ATTRS if '.' in cfs_prop)
 
     def __init__(self,
                  clone_url: Optional[str] = None,
@@ -154,33 +218,49 @@ class CFSLayerBase(ABC):
         if self._name is not None:
             return self._name
 
+        return self._generate_name(self.repo_short_name)
+
+    def _generate_name(self, *name_prefixes: str) -> str:
+        """Generate a layer name from prefixes, the branch or commit, and the time.
+
+        Args:
+            *name_prefixes: the components at the start of the name
+
+        Returns:
+            the name components, the shortened branch or commit, and the
+            current timestamp joined by hyphens
+        """
         branch_or_commit = self.branch or self.commit
         # This shouldn't happen given that __init__ checks that one is specified,
         # but program defensively and satisfy mypy type-checking.
         if not branch_or_commit:
             branch_or_commit = 'default'
 
-        name_components = [
-            self.repo_short_name,
-            branch_or_commit[:MAX_BRANCH_NAME_WIDTH],
-            datetime.now().strftime('%Y%m%dT%H%M%S')
-        ]
-        return '-'.join(name_components)
+        timestamp = _LAYER_NAME_TIMESTAMP.get() or datetime.now().strftime(LAYER_NAME_TIMESTAMP_FORMAT)
+        return '-'.join((*name_prefixes, branch_or_commit[:MAX_BRANCH_NAME_WIDTH], timestamp))
+
+    @property
+    def clone_url(self) -> Optional[str]:
+        """the git repository clone URL"""
+        return self._clone_url
+
+    @clone_url.setter
+    def clone_url(self, clone_url: Optional[str]) -> None:
+        self._clone_url = clone_url
+        # Parse the URL once here since repo_path is compared repeatedly when matching layers
+        self._repo_path = _get_repo_path(clone_url) if clone_url else ''
 
     @property
     def repo_path(self) -> str:
         """the path portion of the clone URL, e.g. /vcs/cray/sat-config-management.git"""
-        if self.clone_url:
-            return urlparse(self.clone_url).path
-        else:
-            return ''
+        return self._repo_path
 
     @property
     def repo_short_name(self) -> str:
         """a shortened version of the repo name, e.g. 'sat-config-management' becomes 'sat'"""
         repo_name = os.path.basename(self.repo_path)
         # Strip off the '.git' suffix then strip off '-config-management' if present
-        return strip_suffix(strip_suffix(repo_name, '.git'), '-config-management')
+        return repo_name.removesuffix('.git').removesuffix('-config-management')
 
     def matches(self, other_layer: 'CFSLayerBase') -> bool:
         """Determine whether this layer matches another layer.
@@ -196,14 +276,18 @@ class CFSLayerBase(ABC):
         Returns:
             True if the layers match, False otherwise.
         """
-        # Layers must be of the same exact type to match. This means they must
-        # both be additional inventory layers or configuration layers, and they
-        # must be using the same version of CFS.
-        if type(self) is not type(other_layer):
-            return False
+        return self.match_key == other_layer.match_key
+
+    @property
+    def match_key(self) -> Tuple:
+        """a hashable key that is equal for any two layers which match
 
-        return all(getattr(self, attr) == getattr(other_layer, attr)
-                   for attr in self.MATCHING_ATTRS)
+        Layers must be of the same exact type to match. This means they must
+        both be additional inventory layers or configuration layers, and they
+        must be using the same version of CFS. The values of `MATCHING_ATTRS`
+        must also be equal.
+        """
+        return (type(self),) + tuple(getattr(self, attr) for attr in self.MATCHING_ATTRS)
 
     def get_updated_values(self, new_layer: 'CFSLayerBase') -> Dict:
         """Get the values which have been updated by the new version of this layer.
@@ -215,13 +299,28 @@ class CFSLayerBase(ABC):
             dict: A dict mapping from the names of updated properties to a tuple
                 which contains the old and new values.
         """
-        updated_values = {}
-        for cfs_prop, attr in self.CFS_PROPS_TO_ATTRS.items():
-            old_value = getattr(self, attr)
-            new_value = getattr(new_layer, attr)
-            if old_value != new_value:
-                updated_values[cfs_prop] = (old_value, new_value)
-        return updated_values
+        old_values = self._ATTR_GETTER(self)
+        new_values = self._ATTR_GETTER(new_layer)
+        # Layers are usually unchanged, which a single tuple comparison can tell
+        if old_values == new_values:
+            return {}
+
+        return {
+            cfs_prop: (old_value, new_value)
+            for (cfs_prop, _), old_value, new_value in zip(self._PROP_PAIRS, old_values, new_values)
+            if old_value != new_value
+        }
+
+    @staticmethod
+    def clear_branch_cache() -> None:
+        """Forget the commit hashes that branches have been resolved to."""
+        _BRANCH_COMMIT_CACHE.clear()
+        _VCS_REPO_CACHE.clear()
+
+    @staticmethod
+    def clear_product_catalog_cache() -> None:
+        """Forget the product catalog loaded by `from_product_catalog`."""
+        _load_product_catalog.cache_clear()
 
     def resolve_branch_to_commit_hash(self) -> None:
         """Resolve a branch to a commit hash and specify only the commit hash.
@@ -231,6 +330,10 @@ class CFSLayerBase(ABC):
         if the 'drop_branches' request parameter is used when creating/updating
         the configuration.
 
+        The commit hash of each branch of each repository is only looked up in
+        VCS once, and then reused for other layers using the same branch until
+        `clear_branch_cache` is called.
+
         Returns:
             None. Modifies `self.branch` and `self.commit`.
 
@@ -248,20 +351,28 @@ class CFSLayerBase(ABC):
             raise CFSConfigurationError(f'Cannot resolve branch {self.branch} to commit hash '
                                         'because clone URL is not specified.')
 
-        vcs_repo = VCSRepo(self.clone_url)
         if self.commit:
             LOGGER.info("%s already specifies a commit hash (%s) and branch (%s); "
                         "overwriting commit hash with latest from branch",
                         self, self.commit, self.branch)
-        try:
-            self.commit = vcs_repo.get_commit_hash_for_branch(self.branch)
-        except VCSError as err:
-            raise CFSConfigurationError(f'Failed to resolve branch {self.branch} '
-                                        f'to commit hash: {err}')
 
-        if not self.commit:
-            raise CFSConfigurationError(f'Failed to resolve branch {self.branch} '
-                                        f'to commit hash. No such branch.')
+        cache_key = (self.clone_url, self.branch)
+        if cache_key in _BRANCH_COMMIT_CACHE:
+            self.commit = _BRANCH_COMMIT_CACHE[cache_key]
+        else:
+            vcs_repo = _VCS_REPO_CACHE.get(self.clone_url)
+            if vcs_repo is None:
+                vcs_repo = _VCS_REPO_CACHE[self.clone_url] = VCSRepo(self.clone_url)
+            try:
+                self.commit = vcs_repo.get_commit_hash_for_branch(self.branch)
+            except VCSError as err:
+                raise CFSConfigurationError(f'Failed to resolve branch {self.branch} '
+                                            f'to commit hash: {err}')
+
+            if not self.commit:
+                raise CFSConfigurationError(f'Failed to resolve branch {self.branch} '
+                                            f'to commit hash. No such branch.')
+            _BRANCH_COMMIT_CACHE[cache_key] = self.commit
 
         # Clear out the branch so only commit hash is passed to CFS
         self.branch = None
@@ -275,8 +386,12 @@ class CFSLayerBase(ABC):
         """
         # Add the additional data to the payload first
         req_payload = {**self.additional_data}
-        for cfs_prop, attr in self.CFS_PROPS_TO_ATTRS.items():
-            value = getattr(self, attr, None)
+        # Copy the dicts that nested properties are set in, so the additional data
+        # is not modified. No CFS properties are nested more than one level deep.
+        for parent in self._NESTED_PROP_PARENTS:
+            if isinstance(req_payload.get(parent), dict):
+                req_payload[parent] = dict(req_payload[parent])
+        for (cfs_prop, _), value in zip(self._PROP_PAIRS, self._ATTR_GETTER(self)):
             if value is not None:
                 set_val_by_path(req_payload, cfs_prop, value)
         return req_payload
@@ -317,10 +432,13 @@ class CFSLayerBase(ABC):
         Returns:
             the CFS configuration layer retrieved from CFS configuration data
         """
-        data_copy = deepcopy(data)
+        # Layer data is mostly strings, so only copy the nested values, which
+        # may have properties popped from them or be modified via additional_data
+        data_copy = {key: deepcopy(value) if isinstance(value, (dict, list)) else value
+                     for key, value in data.items()}
         kwargs = {
             attr: pop_val_by_path(data_copy, cfs_prop)
-            for cfs_prop, attr in cls.CFS_PROPS_TO_ATTRS.items()
+            for cfs_prop, attr in cls._PROP_PAIRS
         }
         return cls(**kwargs, additional_data=data_copy)
 
@@ -329,7 +447,7 @@ class CFSLayerBase(ABC):
                              product_version: Optional[str] = None,
                              commit: Optional[str] = None,
                              branch: Optional[str] = None,
-                             product_catalog: Optional[ProductCatalog] = None,
+                             product_catalog: Optional['ProductCatalog'] = None,
                              **kwargs: Any) -> 'CFSLayerBase':
         """Create a new CFSConfigurationLayer from product catalog data.
 
@@ -341,7 +459,8 @@ class CFSLayerBase(ABC):
             commit: an optional commit override
             branch: an optional branch override
             product_catalog: the product catalog to use. If omitted, the product
-                catalog is loaded from Kubernetes
+                catalog is loaded from Kubernetes the first time it is needed
+                and reused until `clear_product_catalog_cache` is called.
             **kwargs: additional keyword arguments to pass to the constructor
 
         Returns:
@@ -351,6 +470,9 @@ class CFSLayerBase(ABC):
             CFSConfigurationError: if there is a problem getting required info
                 from the product catalog to construct the layer.
         """
+        # Only load the product catalog library, and everything it imports, when it is used
+        from cray_product_catalog.query import ProductCatalogError
+
         fail_msg = (
             f'Failed to create CFS configuration layer for '
             f'{f"version {product_version} of " if product_version else ""}'
@@ -359,7 +481,7 @@ class CFSLayerBase(ABC):
 
         if product_catalog is None:
             try:
-                product_catalog = ProductCatalog()
+                product_catalog = _load_product_catalog()
             except ProductCatalogError as err:
                 raise CFSConfigurationError(f'{fail_msg}: {err}')
 
@@ -394,6 +516,8 @@ class CFSV2AdditionalInventoryLayer(CFSLayerBase):
     CFS_PROPS_TO_ATTRS = CFSLayerBase.CFS_PROPS_TO_ATTRS.copy()
     CFS_PROPS_TO_ATTRS['cloneUrl'] = 'clone_url'
 
+    __slots__ = ()
+
     def __init__(self, **kwargs: Any) -> None:
         """Create a new CFSV2AdditionalInventoryLayer.
 
@@ -414,6 +538,8 @@ class CFSV3AdditionalInventoryLayer(CFSLayerBase):
     CFS_PROPS_TO_ATTRS['source'] = 'source'
     MATCHING_ATTRS = CFSLayerBase.MATCHING_ATTRS + ['source']
 
+    __slots__ = ('source',)
+
     def __init__(self, source: str = None, **kwargs: Any) -> None:
         """Create a new CFSV3AdditionalInventoryLayer.
 
@@ -453,6 +579,8 @@ class CFSV2ConfigurationLayer(CFSV2AdditionalInventoryLayer):
     CFS_PROPS_TO_ATTRS['specialParameters.imsRequireDkms'] = 'ims_require_dkms'
     MATCHING_ATTRS = CFSV2AdditionalInventoryLayer.MATCHING_ATTRS + ['playbook', 'ims_require_dkms']
 
+    __slots__ = ('playbook', 'ims_require_dkms')
+
     def __init__(self, playbook: str = None, ims_require_dkms: bool = None, **kwargs: Any) -> None:
         """Create a new CFSV2ConfigurationLayer
 
@@ -489,19 +617,7 @@ class CFSV2ConfigurationLayer(CFSV2AdditionalInventoryLayer):
         else:
             playbook_name = 'site'
 
-        branch_or_commit = self.branch or self.commit
-        # This shouldn't happen given that __init__ checks that one is specified,
-        # but program defensively and satisfy mypy type-checking.
-        if not branch_or_commit:
-            branch_or_commit = 'default'
-
-        name_components = [
-            self.repo_short_name,
-            playbook_name,
-            branch_or_commit[:MAX_BRANCH_NAME_WIDTH],
-            datetime.now().strftime('%Y%m%dT%H%M%S')
-        ]
-        return '-'.join(name_components)
+        return self._generate_name(self.repo_short_name, playbook_name)
 
 
 # This preserves backwards-compatibility with earlier versions of this library
@@ -517,6 +633,8 @@ class CFSV3ConfigurationLayer(CFSV3AdditionalInventoryLayer):
     CFS_PROPS_TO_ATTRS['special_parameters.ims_require_dkms'] = 'ims_require_dkms'
     MATCHING_ATTRS = CFSV3AdditionalInventoryLayer.MATCHING_ATTRS + ['playbook', 'ims_require_dkms']
 
+    __slots__ = ('playbook', 'ims_require_dkms')
+
     def __init__(self, playbook: str, ims_require_dkms: bool = None, **kwargs: Any) -> None:
         """Create a new CFSV3ConfigurationLayer.
 
@@ -547,19 +665,7 @@ class CFSV3ConfigurationLayer(CFSV3AdditionalInventoryLayer):
             return self._name
 
         playbook_name = os.path.splitext(self.playbook)[0]
-        branch_or_commit = self.branch or self.commit
-        # This shouldn't happen given that __init__ checks that one is specified,
-        # but program defensively and satisfy mypy type-checking.
-        if not branch_or_commit:
-            branch_or_commit = 'default'
-
-        name_components = [
-            self.repo_short_name,
-            playbook_name,
-            branch_or_commit[:MAX_BRANCH_NAME_WIDTH],
-            datetime.now().strftime('%Y%m%dT%H%M%S')
-        ]
-        return '-'.join(name_components)
+        return self._generate_name(self.repo_short_name, playbook_name)
 
 
 class CFSConfigurationBase(ABC):
@@ -573,6 +679,11 @@ class CFSConfigurationBase(ABC):
     cfs_config_layer_cls: type[CFSLayerBase]
     cfs_additional_inventory_cls: type[CFSLayerBase]
 
+    # Properties of the configuration data which are not passed through to CFS
+    # as-is. Note: both the CFS v2 and v3 versions of the lastUpdated field are ignored
+    _NON_PASSTHROUGH_KEYS = frozenset(('layers', 'additional_inventory', 'lastUpdated',
+                                       'last_updated', 'name'))
+
     def __init__(self, cfs_client: 'CFSClientBase', data: Dict) -> None:
         """Create a new CFSConfiguration.
 
@@ -582,12 +693,13 @@ class CFSConfigurationBase(ABC):
         """
         self._cfs_client = cfs_client
         self.data = data
-        self.layers = [self.cfs_config_layer_cls.from_cfs(layer_data)
-                       for layer_data in self.data.get('layers', [])]
+        layers_data = data.get('layers')
+        self.layers = list(map(self.cfs_config_layer_cls.from_cfs, layers_data)) if layers_data else []
         self.additional_inventory: Optional[CFSLayerBase] = None
-        if 'additional_inventory' in self.data:
+        additional_inventory_data = data.get('additional_inventory')
+        if additional_inventory_data is not None:
             self.additional_inventory = self.cfs_additional_inventory_cls.from_cfs(
-                self.data['additional_inventory'])
+                additional_inventory_data)
         self.changed = False
 
     @classmethod
@@ -613,19 +725,22 @@ class CFSConfigurationBase(ABC):
         field that will be saved here is "description", but this safeguards
         against any additional fields that may be added by CFS in the future.
         """
-        # Note: both the CFS v2 and v3 versions of the lastUpdated field are ignored
         return {key: value for key, value in self.data.items()
-                if key not in ('layers', 'additional_inventory', 'lastUpdated',
-                               'last_updated', 'name')}
+                if key not in self._NON_PASSTHROUGH_KEYS}
 
     @property
     def req_payload(self) -> Dict:
         """the request payload to provide in a PUT request to create/update the configuration"""
-        payload: Dict = {
-            'layers': [layer.req_payload for layer in self.layers],
-        }
-        if self.additional_inventory:
-            payload['additional_inventory'] = self.additional_inventory.req_payload
+        # Give all generated layer names the same timestamp
+        timestamp_token = _LAYER_NAME_TIMESTAMP.set(datetime.now().strftime(LAYER_NAME_TIMESTAMP_FORMAT))
+        try:
+            payload: Dict = {
+                'layers': [layer.req_payload for layer in self.layers],
+            }
+            if self.additional_inventory:
+                payload['additional_inventory'] = self.additional_inventory.req_payload
+        finally:
+            _LAYER_NAME_TIMESTAMP.reset(timestamp_token)
         payload.update(self.passthrough_data)
         return payload
 
@@ -663,9 +778,19 @@ class CFSConfigurationBase(ABC):
             raise ValueError('A name must be specified for the CFS configuration.')
 
         existing_cfs_config_data = None
-        # Check if a CFS configuration with the given name already exists when
-        # overwrite is disallowed or when a backup is requested.
-        if not overwrite or backup_suffix:
+        if not (overwrite or backup_suffix):
+            # Only whether the configuration exists matters, which the client
+            # may be able to answer without a request per configuration.
+            try:
+                config_exists = self._cfs_client.configuration_exists(cfs_name)
+            except APIError as err:
+                raise CFSConfigurationError(f'Failed to check for existing CFS '
+                                            f'configuration "{cfs_name}": {err}') from err
+            if config_exists:
+                raise CFSConfigurationError(f'A configuration named {cfs_name} already exists '
+                                            f'and will not be overwritten.')
+        elif backup_suffix:
+            # Get any existing CFS configuration with the given name to back it up
             try:
                 response = self._cfs_client.get('configurations', cfs_name, raise_not_ok=False)
 
@@ -730,26 +855,176 @@ class CFSConfigurationBase(ABC):
             CFSConfigurationError: if there is a failure saving the configuration
                 to the file, or if the file exists and overwrite is `False`.
         """
-        # It only makes sense to make a backup copy if overwriting is requested
-        if backup_suffix and overwrite:
-            path_without_ext, ext = os.path.splitext(file_path)
-            backup_file_path = f'{path_without_ext}{backup_suffix}{ext}'
+        # Serialize the whole payload before opening the file. With an indent,
+        # json.dump issues a write per token, and a failure part way through
+        # would leave a truncated file behind.
+        payload_json = json.dumps(self.req_payload, indent=2)
+        if not overwrite:
             try:
-                shutil.copyfile(file_path, backup_file_path)
-            except FileNotFoundError:
-                LOGGER.debug(f'File {file_path} does not exist so does not need to be backed up.')
+                with open(file_path, 'x') as f:
+                    f.write(payload_json)
+            except FileExistsError:
+                raise CFSConfigurationError(f'Configuration at path {file_path} already exists '
+                                            f'and will not be overwritten.')
+            except OSError as err:
+                raise CFSConfigurationError(f'Failed to write to file {file_path}: {err}')
+            return
+
+        # Write through a symbolic link to the file it points to
+        real_file_path = os.path.realpath(file_path)
+        # Write to a temporary file in the same directory and rename it over the
+        # file, so the file is never left partially written. If that is not
+        # possible, e.g. because the directory is not writable, write in place.
+        tmp_file_path = self._create_replacement_file(real_file_path)
+        try:
+            # It only makes sense to make a backup copy if overwriting is requested
+            if backup_suffix:
+                path_without_ext, ext = os.path.splitext(file_path)
+                backup_file_path = f'{path_without_ext}{backup_suffix}{ext}'
+                try:
+                    # A hard link only keeps the old contents if the file is replaced
+                    self._backup_file(real_file_path, backup_file_path,
+                                      link=tmp_file_path is not None)
+                except FileNotFoundError:
+                    LOGGER.debug(f'File {file_path} does not exist so does not need to be backed up.')
+                except OSError as err:
+                    raise CFSConfigurationError(f'Failed to copy {file_path} to {backup_file_path} '
+                                                f'before overwriting: {err}') from err
+
+            try:
+                if tmp_file_path is not None:
+                    with open(tmp_file_path, 'w') as f:
+                        f.write(payload_json)
+                    os.replace(tmp_file_path, real_file_path)
+                else:
+                    with open(real_file_path, 'w') as f:
+                        f.write(payload_json)
             except OSError as err:
-                raise CFSConfigurationError(f'Failed to copy {file_path} to {backup_file_path} '
-                                            f'before overwriting: {err}') from err
+                raise CFSConfigurationError(f'Failed to write to file {file_path}: {err}')
+        finally:
+            if tmp_file_path is not None:
+                self._remove_file_if_exists(tmp_file_path)
+
+    @staticmethod
+    def _create_replacement_file(file_path: str) -> Optional[str]:
+        """Create an empty temporary file to be renamed over the given file.
+
+        The temporary file is created in the same directory as `file_path`.
+        If `file_path` exists, the temporary file is given its permissions,
+        owner, and group.
+
+        Args:
+            file_path: the path to the file to be replaced
+
+        Returns:
+            The path to the temporary file, or None if it could not be created
+            or given the permissions and ownership of `file_path`.
+        """
+        tmp_file_path = f'{file_path}.{uuid.uuid4().hex}.tmp'
+        try:
+            tmp_file = open(tmp_file_path, 'x')
+        except OSError:
+            return None
+
+        with tmp_file:
+            try:
+                file_stat = os.stat(file_path)
+                tmp_file_stat = os.fstat(tmp_file.fileno())
+                os.chmod(tmp_file_path, stat.S_IMODE(file_stat.st_mode))
+                if (file_stat.st_uid, file_stat.st_gid) != (tmp_file_stat.st_uid, tmp_file_stat.st_gid):
+                    os.chown(tmp_file_path, file_stat.st_uid, file_stat.st_gid)
+            except FileNotFoundError:
+                # The file does not exist yet, so there is nothing to copy
+                pass
+            except OSError:
+                CFSConfigurationBase._remove_file_if_exists(tmp_file_path)
+                return None
+
+        return tmp_file_path
+
+    @staticmethod
+    def _remove_file_if_exists(file_path: str) -> None:
+        """Remove a file, ignoring any failure to do so.
+
+        Args:
+            file_path: the path to the file to remove
+
+        Returns:
+            None
+        """
+        try:
+            os.remove(file_path)
+        except OSError:
+            pass
+
+    @staticmethod
+    def _backup_file(file_path: str, backup_file_path: str, link: bool = True) -> None:
+        """Back up a file, replacing any existing backup.
+
+        Args:
+            file_path: the path to the file to back up
+            backup_file_path: the path to the backup
+            link: if True, make the backup a hard link to the file where the
+                file system supports it, which avoids copying the contents of
+                the file. This must only be used if the file will be replaced
+                rather than modified in place.
+
+        Returns:
+            None
 
+        Raises:
+            FileNotFoundError: if `file_path` does not exist
+            OSError: if the backup cannot be made
+        """
+        tmp_backup_file_path = f'{backup_file_path}.{uuid.uuid4().hex}.tmp'
         try:
-            with open(file_path, 'w' if overwrite else 'x') as f:
-                json.dump(self.req_payload, f, indent=2)
-        except FileExistsError:
-            raise CFSConfigurationError(f'Configuration at path {file_path} already exists '
-                                        f'and will not be overwritten.')
-        except OSError as err:
-            raise CFSConfigurationError(f'Failed to write to file file_path: {err}')
+            if link:
+                try:
+                    os.link(file_path, tmp_backup_file_path)
+                except FileNotFoundError:
+                    raise
+                except OSError:
+                    # Hard links are not supported by every file system
+                    link = False
+            if not link:
+                shutil.copyfile(file_path, tmp_backup_file_path)
+            os.replace(tmp_backup_file_path, backup_file_path)
+        finally:
+            CFSConfigurationBase._remove_file_if_exists(tmp_backup_file_path)
+
+    def resolve_branches(self, max_workers: int = 8) -> None:
+        """Resolve the branches of all layers to commit hashes concurrently.
+
+        This calls `resolve_branch_to_commit_hash` on every layer, including the
+        additional inventory, which specifies a branch. Each branch of each
+        repository is only looked up once, and different branches are looked up
+        concurrently.
+
+        Args:
+            max_workers: the maximum number of branches to look up at once
+
+        Returns:
+            None. Modifies the `branch` and `commit` of the layers.
+
+        Raises:
+            CFSConfigurationError: if there is a failure to resolve any branch
+                to a commit hash.
+        """
+        layers_by_branch: Dict[Tuple[Optional[str], str], List[CFSLayerBase]] = {}
+        for layer in chain(self.layers, [self.additional_inventory]):
+            if layer is not None and layer.branch:
+                layers_by_branch.setdefault((layer.clone_url, layer.branch), []).append(layer)
+        if not layers_by_branch:
+            return
+
+        # Look up each branch once for the first layer using it. The rest of the
+        # layers using that branch are then resolved from the cached commit hash.
+        with ThreadPoolExecutor(max_workers=min(max_workers, len(layers_by_branch))) as executor:
+            list(executor.map(lambda same_branch_layers: same_branch_layers[0].resolve_branch_to_commit_hash(),
+                              layers_by_branch.values()))
+        for same_branch_layers in layers_by_branch.values():
+            for layer in same_branch_layers[1:]:
+                layer.resolve_branch_to_commit_hash()
 
     def ensure_layer(self, layer: CFSLayerBase,
                      state: LayerState = LayerState.PRESENT) -> None:
@@ -763,15 +1038,47 @@ class CFSConfigurationBase(ABC):
         Returns:
             None
         """
-        action = ('Removing', 'Updating')[state is LayerState.PRESENT]
+        present = state is LayerState.PRESENT
+        action = 'Updating' if present else 'Removing'
+
+        # Compute the key of the given layer once rather than on every comparison
+        layer_key = layer.match_key
+        matching_indices = {index for index, existing_layer in enumerate(self.layers)
+                            if existing_layer.match_key == layer_key}
+
+        if not matching_indices:
+            # The existing layers are unchanged, so there is no need to rebuild the list
+            LOGGER.info('No %s found.', layer)
+            if present:
+                LOGGER.info('Adding a %s to the end.', layer)
+                self.changed = True
+                self.layers.append(layer)
+        else:
+            self._replace_matching_layers(layer, matching_indices, present, action)
+
+        if not self.changed:
+            LOGGER.info('No changes to configuration "%s" are necessary.', self.name)
 
+    def _replace_matching_layers(self, layer: CFSLayerBase, matching_indices: Set[int],
+                                 present: bool, action: str) -> None:
+        """Replace or remove the layers at the given indices.
+
+        Args:
+            layer: the layer to replace the matching layers with
+            matching_indices: the indices in `self.layers` of the layers
+                matching `layer`
+            present: whether to replace the matching layers with `layer`
+                rather than remove them
+            action: the action to log for each matching layer
+
+        Returns:
+            None
+        """
         new_layers = []
-        found_match = False
-        for existing_layer in self.layers:
-            if layer.matches(existing_layer):
-                found_match = True
+        for index, existing_layer in enumerate(self.layers):
+            if index in matching_indices:
                 LOGGER.info('%s existing %s', action, existing_layer)
-                if state is LayerState.ABSENT:
+                if not present:
                     # Skip adding this layer to new_layers
                     self.changed = True
                     continue
@@ -783,25 +1090,16 @@ class CFSConfigurationBase(ABC):
                         LOGGER.info('Property "%s" of %s updated from %s to %s',
                                     updated_prop, existing_layer, update[0], update[1])
 
-                # Preserve any existing additional data in the layer
-                layer.additional_data = deepcopy(existing_layer.additional_data)
+                # Preserve any existing additional data in the layer. The existing
+                # layer is replaced, so its additional data can be shared rather than copied.
+                layer.additional_data = existing_layer.additional_data
                 new_layers.append(layer)
             else:
                 # This layer doesn't match, so leave it untouched
                 new_layers.append(existing_layer)
 
-        if not found_match:
-            LOGGER.info('No %s found.', layer)
-            if state is LayerState.PRESENT:
-                LOGGER.info('Adding a %s to the end.', layer)
-                self.changed = True
-                new_layers.append(layer)
-
         self.layers = new_layers
 
-        if not self.changed:
-            LOGGER.info('No changes to configuration "%s" are necessary.', self.name)
-
 
 class CFSV2Configuration(CFSConfigurationBase):
     """CFS V2 configuration"""
@@ -856,6 +1154,16 @@ class CFSImageConfigurationSession:
     CONTAINER_WAITING_VALUE = 'waiting'
     CONTAINER_SUCCEEDED_VALUE = 'succeeded'
     CONTAINER_FAILED_VALUE = 'failed'
+    # The width to which container statuses are padded in status change messages
+    CONTAINER_STATUS_WIDTH = max(map(len, (CONTAINER_RUNNING_VALUE, CONTAINER_WAITING_VALUE,
+                                           CONTAINER_SUCCEEDED_VALUE, CONTAINER_FAILED_VALUE)))
+    # Prefixes of the names of the (non-init) containers in the order they are executed
+    CONTAINER_EXECUTION_ORDER_PREFIXES = ('inventory', 'ansible', 'teardown')
+
+    # Sessions are polled repeatedly, so avoid a per-instance __dict__
+    __slots__ = ('data', 'cfs_client', 'image_name', 'logged_job_wait_msg', 'logged_pod_wait_msg',
+                 'pod', '_last_pod_resource_version', '_log_header_str', '_last_etag',
+                 'init_container_status_by_name', 'container_status_by_name')
 
     def __init__(self, data: Dict, cfs_client: 'CFSClientBase', image_name: str):
         """Create a new CFSImageConfigurationSession
@@ -876,6 +1184,12 @@ class CFSImageConfigurationSession:
 
         # This is set to the V1Pod for this CFS session by update_pod_status
         self.pod: Optional[V1Pod] = None
+        # The resource version of the pod when its container statuses were last read
+        self._last_pod_resource_version: Optional[str] = None
+        # Set by _log_header the first time it is needed
+        self._log_header_str: Optional[str] = None
+        # The ETag of the last session response from CFS, if CFS provided one
+        self._last_etag: Optional[str] = None
 
         # We are assuming unique container names within the pod
         self.init_container_status_by_name: Dict[str, str] = {}
@@ -886,13 +1200,30 @@ class CFSImageConfigurationSession:
         """The name of the CFS session"""
         return self.data.get('name', '')
 
+    @property
+    def _log_header(self) -> str:
+        """The header logged before the container status changes of the session"""
+        if self._log_header_str is None:
+            self._log_header_str = (f'CFS session: {self.name: <{CFSClientBase.MAX_SESSION_NAME_LENGTH}} '
+                                    f'Image: {self.image_name}:')
+        return self._log_header_str
+
+    @property
+    def _session_status_data(self) -> Dict:
+        """The 'session' part of the status of the session, or an empty dict"""
+        # The status properties below are read on every poll of the session, so
+        # index directly rather than parsing a dotted path each time.
+        return (self.data.get('status') or {}).get('session') or {}
+
     @property
     def session_status(self) -> str:
         """The status of the session according to CFS
 
-        This will be one of 'pending', 'running', or 'complete'
+        This will be one of 'pending', 'running', or 'complete', or an empty
+        string if CFS has not reported a status.
         """
-        return str(get_val_by_path(self.data, 'status.session.status'))
+        status = self._session_status_data.get('status')
+        return status if isinstance(status, str) else ''
 
     @property
     def complete(self) -> bool:
@@ -902,12 +1233,13 @@ class CFSImageConfigurationSession:
     @property
     def succeeded(self) -> bool:
         """True if the configuration session succeeded, False otherwise"""
-        return get_val_by_path(self.data, 'status.session.succeeded') == self.SUCCEEDED_VALUE
+        return self._session_status_data.get('succeeded') == self.SUCCEEDED_VALUE
 
     @property
     def kube_job(self) -> str:
-        """The name of the kubernetes job created by this CFS session"""
-        return str(get_val_by_path(self.data, 'status.session.job'))
+        """The name of the kubernetes job created by this CFS session, or an empty string"""
+        job = self._session_status_data.get('job')
+        return job if isinstance(job, str) else ''
 
     @property
     def pod_name(self) -> str:
@@ -921,11 +1253,11 @@ class CFSImageConfigurationSession:
     def start_time(self) -> datetime:
         """The start time of this CFS session"""
         # In CFS v2, the property is startTime. In CFS v3, it's start_time
-        start_time_str = get_val_by_path(self.data, 'status.session.startTime')
+        session_status_data = self._session_status_data
+        start_time_str = session_status_data.get('startTime')
         if start_time_str is None:
-            start_time_str = get_val_by_path(self.data, 'status.session.start_time')
-        # Once we can rely on Python 3.7 or greater, can switch this to use fromisoformat
-        return datetime.strptime(str(start_time_str), '%Y-%m-%dT%H:%M:%S')
+            start_time_str = session_status_data.get('start_time')
+        return datetime.fromisoformat(str(start_time_str))
 
     @property
     def time_since_start(self) -> timedelta:
@@ -935,7 +1267,7 @@ class CFSImageConfigurationSession:
     @property
     def resultant_image_id(self) -> Optional[str]:
         """The ID of the resultant IMS image created by this session or None"""
-        artifact_list = get_val_by_path(self.data, 'status.artifacts', [])
+        artifact_list = (self.data.get('status') or {}).get('artifacts')
         if not artifact_list:
             return None
         # A CFS image customization session can produce more than one resulting
@@ -998,11 +1330,6 @@ class CFSImageConfigurationSession:
         failed_init_containers: List[str],
         failed_containers: List[str]
     ) -> Optional[str]:
-        container_execution_order_prefixes = [
-            'inventory',
-            'ansible',
-            'teardown'
-        ]
         if failed_init_containers:
             # If any init containers fail, none of the (non-init) containers
             # will be run. Kubernetes init containers are executed in-order, so
@@ -1010,20 +1337,23 @@ class CFSImageConfigurationSession:
             # modifying the ordering of the containers.
             return failed_init_containers[0]
         elif failed_containers:
-            for container_name_prefix in container_execution_order_prefixes:
-                matching_failed_containers = [name for name in failed_containers
-                                              if name.startswith(container_name_prefix)]
+            # Group the failed containers by prefix in a single pass
+            failed_containers_by_prefix: Dict[str, List[str]] = {
+                prefix: [] for prefix in CFSImageConfigurationSession.CONTAINER_EXECUTION_ORDER_PREFIXES
+            }
+            for name in failed_containers:
+                for container_name_prefix in CFSImageConfigurationSession.CONTAINER_EXECUTION_ORDER_PREFIXES:
+                    if name.startswith(container_name_prefix):
+                        failed_containers_by_prefix[container_name_prefix].append(name)
+                        break
+
+            for matching_failed_containers in failed_containers_by_prefix.values():
                 if matching_failed_containers:
-                    def extract_numeric_suffix(s: str) -> int:
-                        match = re.search(r'([0-9]+)$', s)
-                        if match is None:
-                            return 0
-                        return int(match.group(0))
-                    return min(matching_failed_containers, key=extract_numeric_suffix)
-            else:
-                # Some container failed that is not listed in the execution
-                # order above.
-                return None
+                    return min(matching_failed_containers, key=_extract_numeric_suffix)
+
+            # Some container failed that is not listed in the execution
+            # order above.
+            return None
         else:
             return None
 
@@ -1039,15 +1369,23 @@ class CFSImageConfigurationSession:
         fail_msg = f'Failed to get updated session status for session {self.name}'
 
         try:
-            session_details = self.cfs_client.get_session(self.name)
+            session_details, etag = self.cfs_client.get_session_if_modified(self.name, self._last_etag)
         except APIError as err:
             raise APIError(f'{fail_msg}: {err}')
 
+        if session_details is None:
+            # The session has not changed since the last query
+            return
+
         try:
             self.data['status'] = session_details['status']
         except KeyError as err:
             raise APIError(f'{fail_msg}: {err} key was missing in response from CFS.')
 
+        # Only remember the ETag once the status from its response has been used,
+        # so that a bad response is not skipped as unmodified by later queries
+        self._last_etag = etag
+
     def get_container_status_description(self, container_status: V1ContainerStatus) -> str:
         """Get a string representation of the container status
 
@@ -1073,11 +1411,35 @@ class CFSImageConfigurationSession:
         else:
             return self.CONTAINER_WAITING_VALUE
 
+    def _get_container_name_width(self, container_name: str) -> int:
+        """Get the width to which container names are padded in status change messages.
+
+        Args:
+            container_name: the name of the container to use if the pod has no
+                container statuses
+
+        Returns:
+            The length of the longest container name in the pod
+        """
+        if not self.pod or not self.pod.status:
+            return len(container_name)
+        pod_status = self.pod.status
+        # Either list of statuses may not be reported yet early in the life of the pod
+        return max(
+            (len(container_status.name)
+             for container_status in chain(
+                 pod_status.init_container_statuses or [],
+                 pod_status.container_statuses or [],
+             ) if container_status is not None),
+            default=len(container_name)
+        )
+
     def get_container_status_change_msg(
         self,
         container_name: str,
         new_status: str,
-        old_status: Optional[str] = None
+        old_status: Optional[str] = None,
+        container_name_width: Optional[int] = None
     ) -> str:
         """Get a nicely formatted container status change message.
 
@@ -1085,38 +1447,22 @@ class CFSImageConfigurationSession:
             container_name: the name of the container that changed state
             new_status: the new status of the container
             old_status: the old status of the container, if known
+            container_name_width: the width to pad the container name to. If
+                omitted, the length of the longest container name in the pod.
 
         Returns:
             The description of the container status change
         """
-        if not self.pod or not self.pod.status:
-            container_name_width = len(container_name)
-        else:
-            container_name_width = max(
-                len(container_status.name)
-                for container_status in chain(
-                    self.pod.status.init_container_statuses,
-                    self.pod.status.container_statuses,
-                ) if container_status is not None
-            )
-        status_width = max(len(status) for status in [
-                self.CONTAINER_RUNNING_VALUE,
-                self.CONTAINER_WAITING_VALUE,
-                self.CONTAINER_SUCCEEDED_VALUE,
-                self.CONTAINER_FAILED_VALUE
-            ]
-        )
+        if container_name_width is None:
+            container_name_width = self._get_container_name_width(container_name)
+        status_width = self.CONTAINER_STATUS_WIDTH
+        from_old_status = f' from {old_status: <{status_width}}' if old_status else ''
 
-        msg = (
+        return (
             f'Container {container_name: <{container_name_width}} '
-            f'transitioned to {new_status: <{status_width}}'
+            f'transitioned to {new_status: <{status_width}}{from_old_status}'
         )
 
-        if old_status:
-            msg += f' from {old_status: <{status_width}}'
-
-        return msg
-
     def _update_container_status(self) -> None:
         """Update init_container and container status mappings
 
@@ -1127,16 +1473,29 @@ class CFSImageConfigurationSession:
             None
         """
         state_log_msgs = []
+        # Avoid formatting status change messages that would not be logged
+        log_changes = LOGGER.isEnabledFor(logging.INFO)
+        # Computed once, when the first status change message is needed
+        container_name_width: Optional[int] = None
 
         # This shouldn't happen since this is only called by update_pod_status
         # after the pod is successfully found.
         if self.pod is None:
             return
 
+        # The pod, including its container statuses, has not changed since the last update
+        resource_version = self.pod.metadata.resource_version if self.pod.metadata else None
+        if resource_version is not None and resource_version == self._last_pod_resource_version:
+            return
+
         # Update both init_container_status_by_name and container_status_by_name
-        for prefix in ('init_', ''):
-            status_by_name = getattr(self, f'{prefix}container_status_by_name')
-            container_statuses = getattr(self.pod.status, f'{prefix}container_statuses')
+        pod_status = self.pod.status
+        if pod_status is None:
+            return
+        for prefix, container_statuses, status_by_name in (
+            ('init_', pod_status.init_container_statuses, self.init_container_status_by_name),
+            ('', pod_status.container_statuses, self.container_status_by_name),
+        ):
             if container_statuses is None:
                 state_log_msgs.append(f'Waiting for container statuses in pod: {prefix}container_statuses is None.')
                 break
@@ -1150,20 +1509,23 @@ class CFSImageConfigurationSession:
 
                 status = self.get_container_status_description(container_status)
 
-                old_status = status_by_name.get(container_status.name)
+                old_status = status_by_name.get(container_name)
 
                 # First time reporting status or status has changed
-                if not old_status or (status != old_status):
-                    state_log_msgs.append(self.get_container_status_change_msg(container_name,
-                                                                               status, old_status))
+                if log_changes and (not old_status or (status != old_status)):
+                    if container_name_width is None:
+                        container_name_width = self._get_container_name_width(container_name)
+                    state_log_msgs.append(self.get_container_status_change_msg(
+                        container_name, status, old_status, container_name_width))
 
                 status_by_name[container_name] = status
 
+        self._last_pod_resource_version = resource_version
+
         if state_log_msgs:
-            LOGGER.info(f'CFS session: {self.name: <{CFSClientBase.MAX_SESSION_NAME_LENGTH}} '
-                        f'Image: {self.image_name}:')
+            LOGGER.info(self._log_header)
             for msg in state_log_msgs:
-                LOGGER.info(f'    {msg}')
+                LOGGER.info('    %s', msg)
 
     def update_pod_status(self, kube_client: CoreV1Api) -> None:
         """Get the pod for the Kubernetes job.
@@ -1194,13 +1556,24 @@ class CFSImageConfigurationSession:
             raise APIError(f'Failed to query Kubernetes for pod associated '
                            f'with CFS Kubernetes job {self.kube_job}: {err}')
 
-        try:
-            self.pod = pods.items[0]
-        except IndexError:
+        self._set_pod(pods.items[0] if pods.items else None)
+
+    def _set_pod(self, pod: Optional[V1Pod]) -> None:
+        """Set the pod for the Kubernetes job and update the container status.
+
+        Args:
+            pod: the pod for the Kubernetes job, or None if it has not been
+                created yet
+
+        Returns:
+            None
+        """
+        if pod is None:
             if not self.logged_pod_wait_msg:
                 LOGGER.info(f'Waiting for creation of Kubernetes pod associated with session {self.name}.')
                 self.logged_pod_wait_msg = True
         else:
+            self.pod = pod
             self._update_container_status()
 
     def update_status(self, kube_client: CoreV1Api) -> None:
@@ -1221,10 +1594,71 @@ class CFSImageConfigurationSession:
         else:
             self.update_pod_status(kube_client)
 
+    @classmethod
+    def update_statuses(cls, sessions: Iterable['CFSImageConfigurationSession'],
+                        kube_client: CoreV1Api) -> None:
+        """Update the status of multiple CFS sessions, listing their pods at once.
+
+        This is equivalent to calling `update_status` on each session, but the
+        pods of all the sessions are listed in a single Kubernetes API request
+        rather than one request per session.
+
+        Args:
+            sessions: the sessions to update
+            kube_client: the Kubernetes API client
+
+        Returns:
+            None. Updates the status stored in each session.
+
+        Raises:
+            APIError: if there is a problem querying the CFS API for the status
+                of a session or the Kubernetes API for the pods of the sessions.
+        """
+        started_sessions = []
+        for session in sessions:
+            session.update_cfs_status()
+            # A session may have started before CFS reports the name of its job
+            if session.session_status == cls.PENDING_VALUE or not session.kube_job:
+                if not session.logged_job_wait_msg:
+                    LOGGER.info(f'Waiting for CFS to create Kubernetes job associated '
+                                f'with session {session.name}.')
+                    session.logged_job_wait_msg = True
+            else:
+                started_sessions.append(session)
+
+        if not started_sessions:
+            return
+
+        job_names = sorted({session.kube_job for session in started_sessions})
+        try:
+            pods = kube_client.list_namespaced_pod(
+                cls.KUBE_NAMESPACE, label_selector=f'job-name in ({",".join(job_names)})'
+            )
+        except ApiException as err:
+            raise APIError(f'Failed to query Kubernetes for pods associated with '
+                           f'CFS Kubernetes jobs {", ".join(job_names)}: {err}')
+
+        pods_by_job_name: Dict[str, V1Pod] = {}
+        for pod in pods.items:
+            if pod.metadata is None or not pod.metadata.labels:
+                continue
+            job_name = pod.metadata.labels.get('job-name')
+            if job_name is not None:
+                pods_by_job_name.setdefault(job_name, pod)
+
+        for session in started_sessions:
+            session._set_pod(pods_by_job_name.get(session.kube_job))
+
 
 class CFSClientBase(APIGatewayClient, ABC):
     MAX_SESSION_NAME_LENGTH = 45
+    # The maximum number of component IDs to query in a single request
+    COMPONENT_IDS_CHUNK_SIZE = 200
+    # The maximum number of component IDs to list in INFO-level log messages
+    MAX_LOGGED_COMPONENT_IDS = 10
     configuration_cls: Type[CFSConfigurationBase]
+    # The key under which get_configuration_names caches configuration names
+    _CONFIGURATION_NAMES_CACHE_KEY = ('configuration names',)
 
     @staticmethod
     @abstractmethod
@@ -1250,9 +1684,9 @@ class CFSClientBase(APIGatewayClient, ABC):
         they must be unique. This method gives an easy way to get a valid, unique
         name, with an optional prefix.
 
-        Note that this uses uuid.uuid4 to generate a 36-character-long uuid and
-        adds a hyphen after the prefix. Since CFS session names are limited to
-        45 characters, the max prefix length is 45 - 36 - 1 = 8.
+        Note that this uses the 32-character hex form of a uuid.uuid4 and adds
+        a hyphen after the prefix. Since CFS session names are limited to 45
+        characters, the max prefix length is 45 - 32 - 1 = 12.
 
         No other validation of the prefix is performed.
 
@@ -1263,16 +1697,16 @@ class CFSClientBase(APIGatewayClient, ABC):
         Returns:
             The session name
         """
-        uuid_str = str(uuid.uuid4())
+        uuid_hex = uuid.uuid4().hex
 
         # Subtract an additional 1 to account for "-" separating prefix from uuid
-        prefix_max_len = CFSClientBase.MAX_SESSION_NAME_LENGTH - len(uuid_str) - 1
+        prefix_max_len = CFSClientBase.MAX_SESSION_NAME_LENGTH - len(uuid_hex) - 1
         if len(prefix) > prefix_max_len:
             LOGGER.warning(f'Given CFS session prefix is too long and will be '
                            f'truncated ({len(prefix)} > {prefix_max_len})')
             prefix = prefix[:prefix_max_len]
 
-        return '-'.join([prefix, uuid_str])
+        return f'{prefix}-{uuid_hex}'
 
     def get_api_version(self) -> Optional[VersionInfo]:
         """Get the API version from the CFS API.
@@ -1333,13 +1767,69 @@ class CFSClientBase(APIGatewayClient, ABC):
             The details of the newly updated or created session
         """
         try:
-            return self.put('configurations', config_name, json=request_body, req_param=request_params).json()
+            config_data = self.put('configurations', config_name, json=request_body,
+                                   req_param=request_params).json()
         except APIError as err:
             raise APIError(f'Failed to update CFS configuration {config_name}: {err}')
         except ValueError as err:
             raise APIError(f'Failed to parse JSON in response from CFS when updating '
                            f'CFS configuration {config_name}: {err}')
 
+        # Keep any cached configuration names up to date with the new configuration,
+        # and discard any cached data for the configuration itself
+        self.invalidate_cached('configurations', config_name)
+        self._update_cached(self._CONFIGURATION_NAMES_CACHE_KEY, lambda names: names | {config_name})
+
+        return config_data
+
+    def get_configuration_names(self) -> FrozenSet[str]:
+        """Get the names of all CFS configurations.
+
+        If this client has a `cache_ttl`, the names are cached until it expires,
+        and the names of configurations saved with `put_configuration` are added
+        to the cached names.
+
+        Returns:
+            The names of all the CFS configurations.
+
+        Raises:
+            APIError: if there is a failure getting the configurations from CFS
+        """
+        try:
+            return self._cached(
+                self._CONFIGURATION_NAMES_CACHE_KEY,
+                lambda: frozenset(config['name'] for config in self.get_configurations())
+            )
+        except KeyError as err:
+            raise APIError(f'Failed to get CFS configuration names: one or more '
+                           f'configurations missing {err} property') from err
+
+    def configuration_exists(self, name: str) -> bool:
+        """Check whether a CFS configuration exists.
+
+        If this client has a `cache_ttl`, this checks the names returned by
+        `get_configuration_names`, so that checking many configurations takes a
+        single request. Otherwise, this requests the given configuration.
+
+        Args:
+            name: the name of the CFS configuration
+
+        Returns:
+            True if the configuration exists, False otherwise.
+
+        Raises:
+            APIError: if there is a failure querying CFS
+        """
+        if self.cache_ttl:
+            return name in self.get_configuration_names()
+
+        response = self.get('configurations', name, raise_not_ok=False)
+        if response.ok:
+            return True
+        if response.status_code != 404:
+            self.raise_from_response(response)
+        return False
+
     def get_session(self, name: str) -> Dict:
         """Get details for a session.
 
@@ -1357,6 +1847,40 @@ class CFSClientBase(APIGatewayClient, ABC):
             raise APIError(f'Failed to parse JSON in response from CFS when getting '
                            f'CFS session {name}: {err}')
 
+    def get_session_if_modified(self, name: str,
+                                etag: Optional[str] = None) -> Tuple[Optional[Dict], Optional[str]]:
+        """Get details for a session if it has changed since it was last queried.
+
+        When `etag` is given, it is sent in an If-None-Match header, and a 304
+        Not Modified response means the session has not changed.
+
+        Args:
+            name: the name of the session to get
+            etag: the ETag of the last response for the session, if any
+
+        Returns:
+            A tuple of the details about the session, or None if the session
+            has not changed, and the ETag to use when next querying the session.
+
+        Raises:
+            APIError: if there is a failure to get the session or parse the
+                response from CFS
+        """
+        headers = {'If-None-Match': etag} if etag else None
+        try:
+            response = self.get('sessions', name, headers=headers)
+        except APIError as err:
+            raise APIError(f'Failed to get CFS session {name}: {err}')
+
+        if response.status_code == 304:
+            return None, etag
+
+        try:
+            return response.json(), response.headers.get('ETag')
+        except ValueError as err:
+            raise APIError(f'Failed to parse JSON in response from CFS when getting '
+                           f'CFS session {name}: {err}')
+
     def create_image_customization_session(
         self, session_name: str, config_name: str, image_id: str,
         target_groups: Iterable[str], image_name: str
@@ -1408,16 +1932,22 @@ class CFSClientBase(APIGatewayClient, ABC):
         return CFSImageConfigurationSession(created_session, self, image_name)
 
     def get_configuration(self, name: str) -> CFSConfigurationBase:
-        """Get a CFS configuration by name."""
+        """Get a CFS configuration by name.
+
+        If this client has a `cache_ttl`, the configuration data is cached
+        until it expires or the configuration is saved with `put_configuration`.
+        """
         try:
-            config_data = self.get('configurations', name).json()
+            config_data = self.get_cached('configurations', name)
         except APIError as err:
             raise APIError(f'Could not retrieve configuration "{name}" from CFS: {err}')
         except json.JSONDecodeError as err:
             raise APIError(f'Invalid JSON response received from CFS when getting '
                            f'configuration "{name}" from CFS: {err}')
-        # Return an appropriate CFS configuration
-        return self.configuration_cls(self, config_data)
+        # Return an appropriate CFS configuration. Copy the data, which may be
+        # shared with the cache, so that changes to the configuration do not
+        # modify it.
+        return self.configuration_cls(self, dict(config_data))
 
     def get_configurations_for_components(self, hsm_client: HSMClient, **kwargs: str) -> List[CFSConfigurationBase]:
         """Get configurations for components matching the given params.
@@ -1437,28 +1967,59 @@ class CFSClientBase(APIGatewayClient, ABC):
         Raises:
             APIError: if there is an error accessing HSM or CFS APIs
         """
-        target_xnames = hsm_client.get_component_xnames(params=kwargs or None)
+        target_xnames = list(hsm_client.get_component_xnames(params=kwargs or None))
+
+        if len(target_xnames) > self.MAX_LOGGED_COMPONENT_IDS:
+            LOGGER.info('Querying CFS configurations for %d components, including: %s',
+                        len(target_xnames), ', '.join(target_xnames[:self.MAX_LOGGED_COMPONENT_IDS]))
+            if LOGGER.isEnabledFor(logging.DEBUG):
+                LOGGER.debug('Querying CFS configurations for the following components: %s',
+                             ', '.join(target_xnames))
+        else:
+            LOGGER.info('Querying CFS configurations for the following components: %s',
+                        ', '.join(target_xnames))
 
-        LOGGER.info('Querying CFS configurations for the following components: %s',
-                    ', '.join(target_xnames))
+        desired_config_key = self.join_words('desired', 'config')
 
-        desired_config_names = set()
-        for xname in target_xnames:
+        def get_chunk_desired_configs(xnames: List[str]) -> Union[List[Tuple[Optional[str], str]], APIError]:
+            # Keep only the ID and desired configuration of each component, so
+            # the full component records can be discarded as soon as they are read
             try:
-                desired_config_name = self.get('components', xname).json().get(
-                    self.join_words('desired', 'config'))
-                if desired_config_name:
-                    LOGGER.info('Found configuration "%s" for component %s',
-                                desired_config_name, xname)
-                    desired_config_names.add(desired_config_name)
+                return [(component.get('id'), component[desired_config_key])
+                        for component in self.get_components(params={'ids': ','.join(xnames)})
+                        if component.get(desired_config_key)]
             except APIError as err:
-                LOGGER.warning('Could not retrieve CFS configuration for component %s: %s',
-                               xname, err)
-            except json.JSONDecodeError as err:
-                LOGGER.warning('CFS returned invalid JSON for component %s: %s',
-                               xname, err)
+                return err
+
+        xname_chunks = [
+            target_xnames[start:start + self.COMPONENT_IDS_CHUNK_SIZE]
+            for start in range(0, len(target_xnames), self.COMPONENT_IDS_CHUNK_SIZE)
+        ]
+        desired_configs: List[Tuple[Optional[str], str]] = []
+        failed_xnames: List[str] = []
+        # Failures of different chunks usually have the same cause, so only report each error once
+        errors: Dict[str, None] = {}
+        for xnames, result in zip(xname_chunks,
+                                  self.map_concurrently(get_chunk_desired_configs, xname_chunks)):
+            if isinstance(result, APIError):
+                failed_xnames.extend(xnames)
+                errors[str(result)] = None
+            else:
+                desired_configs.extend(result)
+
+        if failed_xnames:
+            LOGGER.warning('Could not retrieve CFS configurations for %d of %d components (%s): %s',
+                           len(failed_xnames), len(target_xnames),
+                           ', '.join(failed_xnames[:self.MAX_LOGGED_COMPONENT_IDS]),
+                           '; '.join(errors))
+
+        desired_config_names = set()
+        for component_id, desired_config_name in desired_configs:
+            LOGGER.info('Found configuration "%s" for component %s',
+                        desired_config_name, component_id)
+            desired_config_names.add(desired_config_name)
 
-        return [self.get_configuration(config_name) for config_name in desired_config_names]
+        return self.map_concurrently(self.get_configuration, sorted(desired_config_names))
 
     @abstractmethod
     def get_components(self, params: Dict = None) -> Generator[Dict, None, None]:
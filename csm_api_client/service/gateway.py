@@ -24,14 +24,22 @@
 """
 Client for querying the API gateway.
 """
-from functools import wraps
+from concurrent.futures import ThreadPoolExecutor
+from functools import cached_property, wraps
 import logging
+from threading import Lock
+import time
 import requests
 from typing import (
     Any,
     Callable,
     Dict,
+    Hashable,
+    Iterable,
+    List,
     Optional,
+    Tuple,
+    TypeVar,
 )
 from urllib.parse import urlunparse
 
@@ -41,6 +49,22 @@ from csm_api_client.session import Session
 
 
 LOGGER = logging.getLogger(__name__)
+T = TypeVar('T')
+R = TypeVar('R')
+# The maximum number of requests a client should have in flight at once when
+# issuing independent requests concurrently
+MAX_CONCURRENT_REQUESTS = 16
+# Mapping from the request types accepted by APIGatewayClient._make_req to the
+# name of the requests.Session method which issues each type of request and
+# the names of the keyword arguments passed to that method
+REQUEST_TYPES: Dict[str, Tuple[str, Tuple[str, ...]]] = {
+    'GET': ('get', ('params',)),
+    'STREAM': ('get', ('params', 'stream')),
+    'POST': ('post', ('data', 'params', 'json')),
+    'PUT': ('put', ('data', 'params', 'json')),
+    'PATCH': ('patch', ('data', 'params', 'json')),
+    'DELETE': ('delete', ()),
+}
 
 
 def handle_api_errors(fn: Callable) -> Callable:
@@ -81,20 +105,54 @@ class APIGatewayClient:
     # This can be set in subclasses to make a client for a specific API
     base_resource_path = ''
 
-    def __init__(self, session: Session, timeout: Optional[int] = None):
+    def __init__(self, session: Session, timeout: Optional[int] = None,
+                 cache_ttl: Optional[float] = None):
         """Initialize the APIGatewayClient.
 
         Args:
             session: The Session instance to use when making REST calls,
                 or None to make connections without a session.
             timeout: timeout to use for requests
+            cache_ttl: the number of seconds for which responses to GET
+                requests made with `get_cached` are cached, or None to
+                disable caching.
         """
         self.session = session
         self.timeout = timeout
+        self.cache_ttl = cache_ttl
+        self._response_cache: Dict[Hashable, Tuple[float, Any]] = {}
+        self._response_cache_lock = Lock()
+
+    @cached_property
+    def _url_prefix(self) -> str:
+        """The URL of the base_resource_path, to which request paths are appended"""
+        # Remove any leading or trailing '/' on base_resource_path to avoid duplicate '/' in URL
+        stripped_base = self.base_resource_path.strip('/')
+        path = f'apis/{stripped_base}' if stripped_base else 'apis'
+        return urlunparse(('https', self.session.host, path, '', '', ''))
 
     def set_timeout(self, timeout: Optional[int]) -> None:
         self.timeout = timeout
 
+    def invalidate_cache(self) -> None:
+        """Discard all responses cached by `get_cached`."""
+        with self._response_cache_lock:
+            self._response_cache.clear()
+
+    def invalidate_cached(self, *args: str, params: Optional[Dict] = None) -> None:
+        """Discard the response cached by `get_cached` for a single request.
+
+        Args:
+            *args: Variable length list of path components used to construct
+                the path to the resource.
+            params: the parameters of the request.
+
+        Returns:
+            None
+        """
+        with self._response_cache_lock:
+            self._response_cache.pop(self._get_cache_key(args, params), None)
+
     @staticmethod
     def raise_from_response(response: Response) -> None:
         """Raise an APIError based on the response body
@@ -129,6 +187,7 @@ class APIGatewayClient:
         req_body: Optional[Dict] = None,
         json: Dict = None,
         raise_not_ok: bool = True,
+        headers: Optional[Dict[str, str]] = None,
     ) -> Response:
         """Perform HTTP request with type `req_type` to resource given in `args`.
         Args:
@@ -141,6 +200,7 @@ class APIGatewayClient:
                 a POST, PUT, or PATCH request.
             raise_not_ok: If True and the response code is >=400, raise
                 an APIError. If False, return the response object.
+            headers: additional HTTP headers to send with the request
 
         Returns:
             The requests.models.Response object if the request was successful.
@@ -151,34 +211,24 @@ class APIGatewayClient:
                 raise_not_ok is True, or request raises a RequestException of any
                 kind.
         """
-        # Remove any leading or trailing '/' on base_resource_path to avoid duplicate '/' in URL
-        stripped_base = self.base_resource_path.strip('/')
-        if stripped_base:
-            path = '/'.join(('apis', self.base_resource_path.strip('/')) + args)
-        else:
-            path = '/'.join(('apis',) + args)
-        url = urlunparse(('https', self.session.host, path , '', '', ''))
+        url = '/'.join((self._url_prefix,) + args)
 
         LOGGER.debug("Issuing %s request to URL '%s'", req_type, url)
 
-        requester = self.session.session
+        try:
+            method_name, arg_names = REQUEST_TYPES[req_type]
+        except KeyError:
+            # Internal error not expected to occur.
+            raise ValueError("Request type '{}' is invalid.".format(req_type))
+
+        all_args = {'params': req_param, 'data': req_body, 'json': json, 'stream': True}
+        method = getattr(self.session.session, method_name)
+        request_kwargs = {name: all_args[name] for name in arg_names}
+        if headers is not None:
+            request_kwargs['headers'] = headers
 
         try:
-            if req_type == 'GET':
-                r = requester.get(url, params=req_param, timeout=self.timeout)
-            elif req_type == 'STREAM':
-                r = requester.get(url, params=req_param, stream=True, timeout=self.timeout)
-            elif req_type == 'POST':
-                r = requester.post(url, data=req_body, params=req_param, json=json, timeout=self.timeout)
-            elif req_type == 'PUT':
-                r = requester.put(url, data=req_body, params=req_param, json=json, timeout=self.timeout)
-            elif req_type == 'PATCH':
-                r = requester.patch(url, data=req_body, params=req_param, json=json, timeout=self.timeout)
-            elif req_type == 'DELETE':
-                r = requester.delete(url, timeout=self.timeout)
-            else:
-                # Internal error not expected to occur.
-                raise ValueError("Request type '{}' is invalid.".format(req_type))
+            r = method(url, **request_kwargs, timeout=self.timeout)
         except requests.exceptions.ReadTimeout as err:
             if req_type == 'STREAM':
                 raise ReadTimeout("{} request to URL '{}' timeout: {}".format(req_type, url, err))
@@ -187,8 +237,10 @@ class APIGatewayClient:
         except requests.exceptions.RequestException as err:
             raise APIError("{} request to URL '{}' failed: {}".format(req_type, url, err))
 
-        LOGGER.debug("Received response to %s request to URL '%s' "
-                     "with status code: '%s': %s", req_type, r.url, r.status_code, r.reason)
+        # Avoid looking up response attributes when debug logging is disabled
+        if LOGGER.isEnabledFor(logging.DEBUG):
+            LOGGER.debug("Received response to %s request to URL '%s' "
+                         "with status code: '%s': %s", req_type, r.url, r.status_code, r.reason)
 
         if raise_not_ok and not r.ok:
             self.raise_from_response(r)
@@ -215,6 +267,118 @@ class APIGatewayClient:
 
         return r
 
+    def map_concurrently(self, fn: Callable[[T], R], items: Iterable[T]) -> List[R]:
+        """Call a function that makes requests on each of the given items concurrently.
+
+        The function is called from a pool of at most MAX_CONCURRENT_REQUESTS
+        threads. Its requests can use this client, which reuses the pooled
+        connections of the session across threads.
+
+        Args:
+            fn: the function to call on each item
+            items: the items on which to call `fn`
+
+        Returns:
+            The results of calling `fn` on each item, in the order of `items`.
+
+        Raises:
+            Any exception raised by `fn`.
+        """
+        items = list(items)
+        if len(items) <= 1:
+            return [fn(item) for item in items]
+
+        with ThreadPoolExecutor(max_workers=min(len(items), MAX_CONCURRENT_REQUESTS)) as executor:
+            return list(executor.map(fn, items))
+
+    def get_cached(self, *args: str, params: Optional[Dict] = None) -> Any:
+        """Issue an HTTP GET request and return the data decoded from the JSON response.
+
+        If this client has a `cache_ttl`, the decoded data is cached, and
+        subsequent calls with the same path and parameters return the cached
+        data without making a request until `cache_ttl` seconds have passed.
+        The cached data is shared between callers, so it must not be modified.
+
+        Args:
+            *args: Variable length list of path components used to construct
+                the path to the resource to GET.
+            params: Parameters dictionary to pass through to request.get.
+
+        Returns:
+            The data decoded from the JSON response body.
+
+        Raises:
+            APIError: if the status code of the response is >= 400 or requests.get
+                raises a RequestException of any kind.
+            ValueError: if the response body is not valid JSON.
+        """
+        if not self.cache_ttl:
+            return self.get(*args, params=params).json()
+
+        return self._cached(self._get_cache_key(args, params),
+                            lambda: self.get(*args, params=params).json())
+
+    @staticmethod
+    def _get_cache_key(args: Tuple[str, ...], params: Optional[Dict] = None) -> Hashable:
+        """Get the key under which `get_cached` caches the response to a GET request.
+
+        Args:
+            args: the path components of the resource
+            params: the parameters of the request
+
+        Returns:
+            The cache key for the request
+        """
+        # Lists (e.g. for parameters passed more than once) are not hashable
+        return (args, tuple(sorted(
+            (key, tuple(value) if isinstance(value, list) else value)
+            for key, value in (params or {}).items()
+        )))
+
+    def _cached(self, cache_key: Hashable, load: Callable[[], T]) -> T:
+        """Get a value from the cache, loading and caching it if missing or expired.
+
+        If this client has no `cache_ttl`, the value is always loaded.
+
+        Args:
+            cache_key: the key under which the value is cached
+            load: the function to call to load the value
+
+        Returns:
+            The cached or newly loaded value.
+        """
+        if not self.cache_ttl:
+            return load()
+
+        with self._response_cache_lock:
+            cached = self._response_cache.get(cache_key)
+        if cached is not None and time.monotonic() - cached[0] < self.cache_ttl:
+            return cached[1]
+
+        value = load()
+        with self._response_cache_lock:
+            self._response_cache[cache_key] = (time.monotonic(), value)
+        return value
+
+    def _update_cached(self, cache_key: Hashable, update: Callable[[T], T]) -> None:
+        """Update a value cached by `_cached`, if one is cached.
+
+        The updated value expires at the same time as the original value.
+
+        Args:
+            cache_key: the key under which the value is cached
+            update: the function to call on the cached value to get the
+                updated value
+
+        Returns:
+            None
+        """
+        with self._response_cache_lock:
+            cached = self._response_cache.get(cache_key)
+            if cached is not None:
+                cached_time, value = cached
+                self._response_cache[cache_key] = (cached_time, update(value))
+
     def stream(self, *args: str, params: Optional[Dict] = None, **kwargs: Any) -> Response:
         """Issue an HTTP GET stream request to resource given in `args`.
 
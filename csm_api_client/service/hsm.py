@@ -24,13 +24,16 @@
 """
 Client for querying the Hardware State Manager (HSM) API
 """
+from copy import deepcopy
 import logging
 from typing import (
     Dict,
     Iterable,
+    List,
     Optional,
     Set,
     Tuple,
+    Union,
 )
 
 from csm_api_client.service.gateway import (
@@ -52,13 +55,14 @@ class HSMClient(APIGatewayClient):
 
     def get_bmcs_by_type(
         self,
-        bmc_type: Optional[str] = None,
+        bmc_type: Union[str, List[str], None] = None,
         check_keys: bool = True
     ) -> Iterable[Dict]:
-        """Get a list of BMCs, optionally of a single type.
+        """Get a list of BMCs, optionally of a single type or list of types.
 
         Args:
-            bmc_type: Any HSM BMC type: NodeBMC, RouterBMC or ChassisBMC.
+            bmc_type: Any HSM BMC type: NodeBMC, RouterBMC or ChassisBMC, or a
+                list of those types to get BMCs of any of the given types.
             check_keys: Whether or not to filter data based on missing keys.
 
         Returns:
@@ -95,10 +99,14 @@ class HSMClient(APIGatewayClient):
                 ', '.join(invalid_redfish_endpoint_xnames)
             )
 
-        return [
-            endpoint for endpoint in redfish_endpoints
-            if endpoint.get('ID') not in invalid_redfish_endpoint_xnames
-        ]
+            # Use a set for constant-time lookups when filtering the endpoints
+            invalid_xnames_set = set(invalid_redfish_endpoint_xnames)
+            return [
+                endpoint for endpoint in redfish_endpoints
+                if endpoint.get('ID') not in invalid_xnames_set
+            ]
+
+        return redfish_endpoints
 
     def get_and_filter_bmcs(
         self,
@@ -123,10 +131,14 @@ class HSMClient(APIGatewayClient):
         """
         if set(bmc_types) == set(BMC_TYPES):
             bmcs = self.get_bmcs_by_type()
+        elif len(bmc_types) == 1:
+            bmcs = self.get_bmcs_by_type(bmc_types[0])
+        elif bmc_types:
+            # HSM accepts the type parameter more than once, so get all the
+            # requested types in a single request.
+            bmcs = self.get_bmcs_by_type(list(bmc_types))
         else:
             bmcs = []
-            for bmc_type in bmc_types:
-                bmcs.extend(self.get_bmcs_by_type(bmc_type))
 
         # Filter given xnames by type
         hsm_xnames = set(bmc['ID'] for bmc in bmcs)
@@ -189,30 +201,38 @@ class HSMClient(APIGatewayClient):
             APIError: if there is a failure querying the HSM API or getting
                 the required information from the response.
         """
-        if params:
-            params_string = f' with {", ".join(f"{key}={value}" for key, value in params.items())}'
-        else:
-            params_string = ''
+        def err_prefix() -> str:
+            # Only build the message when a failure actually needs it
+            if params:
+                params_string = f' with {", ".join(f"{key}={value}" for key, value in params.items())}'
+            else:
+                params_string = ''
+            return f'Failed to get components{params_string}.'
 
-        err_prefix = f'Failed to get components{params_string}.'
+        # Only the ID and State of each component are needed, so ask HSM to
+        # omit the other fields from the response to reduce its size.
+        request_params = {**(params or {}), 'stateonly': 'true'}
 
         try:
-            components = self.get('State', 'Components', params=params).json()['Components']
+            components = self.get_cached('State', 'Components', params=request_params)['Components']
         except APIError as err:
-            raise APIError(f'{err_prefix}: {err}')
+            raise APIError(f'{err_prefix()}: {err}')
         except ValueError as err:
-            raise APIError(f'{err_prefix} due to bad JSON in response: {err}')
+            raise APIError(f'{err_prefix()} due to bad JSON in response: {err}')
         except KeyError as err:
-            raise APIError(f'{err_prefix} due to missing {err} key in response.')
+            raise APIError(f'{err_prefix()} due to missing {err} key in response.')
 
         try:
+            # Empty components are filtered out here rather than by passing
+            # every other state to HSM, so that any states added to HSM later
+            # are not dropped.
             if omit_empty:
                 return [component['ID'] for component in components
                         if component['State'] != 'Empty']
             else:
                 return [component['ID'] for component in components]
         except KeyError as err:
-            raise APIError(f'{err_prefix} due to missing {err} key in list of components.')
+            raise APIError(f'{err_prefix()} due to missing {err} key in list of components.')
 
     @handle_api_errors
     def query_components(self, component: Optional[str] = None, **kwargs: str) -> Iterable[Dict[str, str]]:
@@ -266,10 +286,10 @@ class HSMClient(APIGatewayClient):
                 if not ancestor_xname.is_valid:
                     raise APIError(f'Could not get descendants of {ancestor}: invalid xname')
 
-                components = self.get('State', 'Components', 'Query', str(ancestor_xname),
-                                      params={'type': 'Node'}).json()
+                components = self.get_cached('State', 'Components', 'Query', str(ancestor_xname),
+                                             params={'type': 'Node'})
             else:
-                components = self.get('State', 'Components', params={'type': 'Node'}).json()
+                components = self.get_cached('State', 'Components', params={'type': 'Node'})
 
             components = components['Components']
         except APIError as err:
@@ -279,7 +299,8 @@ class HSMClient(APIGatewayClient):
         except KeyError as err:
             raise APIError(f'{err_prefix} due to missing {err} key in response.')
 
-        return components
+        # Cached data is shared between calls, so callers get their own copy
+        return deepcopy(components) if self.cache_ttl else components
 
     def get_all_components(self) -> Components:
         """Get all components from HSM.
@@ -356,23 +377,27 @@ class HSMClient(APIGatewayClient):
         """
 
         if not cids:
-            components = self.get_component_history_by_id(None, by_fru)
-        else:
-            components = []
-            for cid in cids:
-                # An exception is raised if HSM API returns a 400 when
-                # an xname has an invalid format.
-                # If the cid is a FRUID or a correctly formatted xname
-                # that does not exist in the hardware inventory,
-                # then None is returned because History is an empty list.
-                # In either case (exception or None is returned),
-                # keep going and try to get history for other cids.
-                try:
-                    component_history = self.get_component_history_by_id(cid, by_fru)
-                    if component_history:
-                        components.extend(component_history)
-                except APIError as err:
-                    LOGGER.debug(f'HSM API error for {cid}: {err}')
+            return self.get_component_history_by_id(None, by_fru)
+
+        def get_history(cid: str) -> Components:
+            # An exception is raised if HSM API returns a 400 when
+            # an xname has an invalid format.
+            # If the cid is a FRUID or a correctly formatted xname
+            # that does not exist in the hardware inventory,
+            # then None is returned because History is an empty list.
+            # In either case (exception or None is returned),
+            # keep going and try to get history for other cids.
+            try:
+                return self.get_component_history_by_id(cid, by_fru) or []
+            except APIError as err:
+                LOGGER.debug(f'HSM API error for {cid}: {err}')
+                return []
+
+        # The history of each component is an independent request, so issue
+        # the requests concurrently.
+        components: List[Dict[str, str]] = []
+        for component_history in self.map_concurrently(get_history, cids):
+            components.extend(component_history)
 
         return components
 
@@ -37,13 +37,29 @@ from kubernetes.client import CoreV1Api
 from oauthlib.oauth2 import (UnauthorizedClientError, MissingTokenError,
                              InvalidGrantError, LegacyApplicationClient)
 import requests
+from requests.adapters import HTTPAdapter
 from requests_oauthlib import OAuth2Session
+from urllib3.util.retry import Retry
 
 from csm_api_client.k8s import load_kube_api
 
 
 LOGGER = logging.getLogger(__name__)
 
+# Connection pool sizing for the HTTPS adapter mounted on each session. The
+# pool is keyed by host, so only a few pools are needed, but each pool should
+# hold enough connections for clients issuing requests from multiple threads.
+POOL_CONNECTIONS = 10
+POOL_MAXSIZE = 50
+# Retry transient gateway errors on idempotent requests. Connection errors and
+# read timeouts are not retried. As with the default retry policy of requests,
+# read=False re-raises read timeouts so that they surface as ReadTimeout.
+# Retry-After headers are ignored, since a long Retry-After would block each
+# request regardless of the client's timeout; backoff_factor sets the delay.
+MAX_RETRIES = Retry(total=3, connect=0, read=False, status=3, backoff_factor=0.2,
+                    status_forcelist=[502, 503, 504], raise_on_status=False,
+                    respect_retry_after_header=False)
+
 
 class Session(ABC):
     """Manage API sessions, authentication, and token storage/retrieval."""
@@ -66,6 +82,10 @@ class Session(ABC):
             **(session_opts or {})
         )
         self.session.verify = self.cert_verify
+        # Reuse TCP/TLS connections to the API gateway across requests
+        self.session.mount('https://', HTTPAdapter(pool_connections=POOL_CONNECTIONS,
+                                                   pool_maxsize=POOL_MAXSIZE,
+                                                   max_retries=MAX_RETRIES))
 
     @property
     @abstractmethod
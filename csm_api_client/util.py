@@ -102,6 +102,10 @@ def pop_val_by_path(dict_val: dict, dotted_path: str, default_value: Optional[An
     if not dotted_path:
         raise ValueError('pop_val_by_path requires a non-empty path')
 
+    # Most paths are a single key, which needs no splitting or traversal
+    if '.' not in dotted_path:
+        return dict_val.pop(dotted_path, default_value)
+
     split_path = dotted_path.split('.')
 
     for key in split_path[:-1]:
@@ -163,6 +167,11 @@ def set_val_by_path(dict_val: dict, dotted_path: str, value: Any) -> None:
     if not dotted_path:
         raise ValueError('set_val_by_path requires a non-empty path')
 
+    # Most paths are a single key, which needs no splitting or traversal
+    if '.' not in dotted_path:
+        dict_val[dotted_path] = value
+        return
+
     split_path = dotted_path.split('.')
 
     for key in split_path[:-1]:
@@ -180,8 +189,4 @@ def strip_suffix(s: str, suffix: str) -> str:
         s: The string to remove the suffix from.
         suffix: The suffix to remove from the string.
     """
-    if not suffix:
-        return s
-    if s.endswith(suffix):
-        return s[:-len(suffix)]
-    return s
+    return s.removesuffix(suffix)
@@ -29,11 +29,15 @@ import json
 import logging
 from copy import deepcopy
 import datetime
+import os
+import stat
+import tempfile
 from typing import List
 import unittest
 from unittest.mock import Mock, call, patch, MagicMock
 
 from cray_product_catalog.query import ProductCatalogError
+from kubernetes.client import ApiException
 
 from csm_api_client.service.cfs import (
     CFSClientBase,
@@ -78,6 +82,7 @@ class TestCFSLayerBase(unittest.TestCase):
                                             additional_data=self.additional_data)
 
         self.mock_vcs_repo_cls = patch('csm_api_client.service.cfs.VCSRepo').start()
+        CFSLayerBase.clear_branch_cache()
         self.mock_vcs_repo = self.mock_vcs_repo_cls.return_value
 
         self.mock_datetime = patch('csm_api_client.service.cfs.datetime', wraps=datetime.datetime).start()
@@ -148,6 +153,24 @@ class TestCFSLayerBase(unittest.TestCase):
         """Test the repo_path property of CFSConfigurationLayerBase."""
         self.assertEqual(self.repo_path, self.cfs_layer.repo_path)
 
+    def test_repo_path_updated_with_clone_url(self):
+        """Test the repo_path property of CFSConfigurationLayerBase follows changes to clone_url."""
+        self.cfs_layer.clone_url = 'https://api-gw-service-nmn.local/vcs/cray/other-config-management.git'
+        self.assertEqual('/vcs/cray/other-config-management.git', self.cfs_layer.repo_path)
+
+    def test_layers_have_no_instance_dict(self):
+        """Test that layers of all CFS versions use __slots__ instead of a __dict__."""
+        layers = [
+            self.cfs_layer,
+            CFSV2AdditionalInventoryLayer(clone_url=self.clone_url, commit=self.commit),
+            CFSV3AdditionalInventoryLayer(source='sat-source', commit=self.commit),
+            CFSV2ConfigurationLayer(clone_url=self.clone_url, commit=self.commit),
+            CFSV3ConfigurationLayer(clone_url=self.clone_url, commit=self.commit, playbook='site.yml'),
+        ]
+        for layer in layers:
+            with self.subTest(layer_cls=type(layer).__name__):
+                self.assertFalse(hasattr(layer, '__dict__'))
+
     def test_repo_short_name(self):
         """Test the repo_short_name property of CFSConfigurationLayerBase."""
         self.assertEqual(self.product, self.cfs_layer.repo_short_name)
@@ -177,6 +200,11 @@ class TestCFSLayerBase(unittest.TestCase):
             'commit': (self.commit, new_commit)
         }, updated_values)
 
+    def test_get_updated_values_none_updated(self):
+        """Test get_updated_values with an identical layer."""
+        new_layer = self.cfs_layer_cls(clone_url=self.clone_url, name=self.name, commit=self.commit)
+        self.assertEqual({}, self.cfs_layer.get_updated_values(new_layer))
+
     def test_resolve_branch_no_branch(self):
         """Test resolve_branch_to_commit_hash when no branch is specified."""
         self.cfs_layer.resolve_branch_to_commit_hash()
@@ -198,6 +226,42 @@ class TestCFSLayerBase(unittest.TestCase):
                          cfs_layer.commit)
         self.assertIsNone(cfs_layer.branch)
 
+    def test_resolve_branch_cached(self):
+        """Test resolve_branch_to_commit_hash only queries VCS once for the same branch."""
+        branch = 'integration'
+        cfs_layers = [self.cfs_layer_cls(clone_url=self.clone_url, name=self.name, branch=branch)
+                      for _ in range(3)]
+
+        for cfs_layer in cfs_layers:
+            cfs_layer.resolve_branch_to_commit_hash()
+
+        self.mock_vcs_repo_cls.assert_called_once_with(self.clone_url)
+        self.mock_vcs_repo.get_commit_hash_for_branch.assert_called_once_with(branch)
+        for cfs_layer in cfs_layers:
+            self.assertEqual(self.mock_vcs_repo.get_commit_hash_for_branch.return_value,
+                             cfs_layer.commit)
+            self.assertIsNone(cfs_layer.branch)
+
+    def test_resolve_branch_reuses_vcs_repo(self):
+        """Test resolve_branch_to_commit_hash reuses the VCSRepo for branches of the same repo."""
+        for branch in ('integration', 'main'):
+            cfs_layer = self.cfs_layer_cls(clone_url=self.clone_url, name=self.name, branch=branch)
+            cfs_layer.resolve_branch_to_commit_hash()
+
+        self.mock_vcs_repo_cls.assert_called_once_with(self.clone_url)
+        self.assertEqual([call('integration'), call('main')],
+                         self.mock_vcs_repo.get_commit_hash_for_branch.call_args_list)
+
+    def test_resolve_branch_cache_cleared(self):
+        """Test resolve_branch_to_commit_hash queries VCS again after clearing the cache."""
+        branch = 'integration'
+        for _ in range(2):
+            cfs_layer = self.cfs_layer_cls(clone_url=self.clone_url, name=self.name, branch=branch)
+            cfs_layer.resolve_branch_to_commit_hash()
+            CFSLayerBase.clear_branch_cache()
+
+        self.assertEqual(2, self.mock_vcs_repo.get_commit_hash_for_branch.call_count)
+
     def test_resolve_branch_with_commit(self):
         """Test resolve_branch_to_commit_hash when branch and commit are specified."""
         branch = 'integration'
@@ -804,6 +868,17 @@ class TestCFSV3ConfigurationLayer(unittest.TestCase):
         }
         self.assertEqual(expected_payload, cfs_layer.req_payload)
 
+    def test_payload_does_not_modify_additional_data(self):
+        """Test req_payload of CFSV3ConfigurationLayer leaves nested additional data unchanged"""
+        cfs_layer = CFSV3ConfigurationLayer(
+            clone_url=self.clone_url, name=self.name,
+            commit=self.commit, playbook=self.playbook,
+            ims_require_dkms=True, additional_data=self.additional_data
+        )
+        original_additional_data = deepcopy(self.additional_data)
+        self.assertTrue(cfs_layer.req_payload['special_parameters']['ims_require_dkms'])
+        self.assertEqual(original_additional_data, cfs_layer.additional_data)
+
     def test_payload_with_ims_require_dkms_false(self):
         """Test req_payload property of CFSV3ConfigurationLayer with ims_require_dkms set to False"""
         cfs_layer = CFSV3ConfigurationLayer(
@@ -839,6 +914,22 @@ class TestCFSV3ConfigurationLayer(unittest.TestCase):
         self.assertEqual(self.playbook, cfs_layer.playbook)
         self.assertTrue(cfs_layer.ims_require_dkms)
 
+    def test_from_cfs_does_not_modify_data(self):
+        """Test that from_cfs leaves the given data and its nested values unchanged."""
+        cfs_layer_data = {
+            'clone_url': self.clone_url,
+            'commit': self.commit,
+            'playbook': self.playbook,
+            'special_parameters': {'ims_require_dkms': True, 'other': 'value'}
+        }
+        original_data = deepcopy(cfs_layer_data)
+        cfs_layer = CFSV3ConfigurationLayer.from_cfs(cfs_layer_data)
+
+        self.assertEqual(original_data, cfs_layer_data)
+        self.assertEqual({'special_parameters': {'other': 'value'}}, cfs_layer.additional_data)
+        self.assertIsNot(cfs_layer_data['special_parameters'],
+                         cfs_layer.additional_data['special_parameters'])
+
 
 class TestCFSLayersMatch(unittest.TestCase):
     """Tests for the matches method of CFSLayerBase subclasses."""
@@ -860,6 +951,7 @@ class TestCFSLayersMatch(unittest.TestCase):
         # Check both ways to ensure symmetric relationship
         self.assertTrue(layer_1.matches(layer_2))
         self.assertTrue(layer_2.matches(layer_1))
+        self.assertEqual(layer_1.match_key, layer_2.match_key)
 
     def assert_does_not_match(self, layer_1, layer_2):
         """Assert the given layer does not match `self.cfs_config_layer`.
@@ -871,6 +963,7 @@ class TestCFSLayersMatch(unittest.TestCase):
         # Check both ways to ensure symmetric relationship
         self.assertFalse(layer_1.matches(layer_2))
         self.assertFalse(layer_2.matches(layer_1))
+        self.assertNotEqual(layer_1.match_key, layer_2.match_key)
 
     def test_additional_inventory_layers_match(self):
         """Test matches method against matching additional inventory layers"""
@@ -997,7 +1090,8 @@ class TestCFSConfigurationLayerFromProduct(unittest.TestCase):
         self.api_gw_host = 'api-gw-host.local'
         self.expected_clone_url = f'https://{self.api_gw_host}/vcs/cray/{self.product_name}-config-management.git'
 
-        self.mock_product_catalog_cls = patch('csm_api_client.service.cfs.ProductCatalog').start()
+        CFSLayerBase.clear_product_catalog_cache()
+        self.mock_product_catalog_cls = patch('cray_product_catalog.query.ProductCatalog').start()
         self.mock_product_catalog = self.mock_product_catalog_cls.return_value
         self.mock_product = self.mock_product_catalog.get_product.return_value
         self.mock_product.clone_url = self.clone_url
@@ -1005,6 +1099,7 @@ class TestCFSConfigurationLayerFromProduct(unittest.TestCase):
 
     def tearDown(self):
         patch.stopall()
+        CFSLayerBase.clear_product_catalog_cache()
 
     def test_product_defaults_with_product_catalog(self):
         """Test from_product_catalog with defaults from product entry."""
@@ -1076,6 +1171,25 @@ class TestCFSConfigurationLayerFromProduct(unittest.TestCase):
         with self.assertRaisesRegex(CFSConfigurationError, err_regex):
             CFSLayerBase.from_product_catalog(self.product_name, self.api_gw_host)
 
+    def test_product_catalog_reused(self):
+        """Test from_product_catalog loads the product catalog once for multiple layers."""
+        for _ in range(2):
+            CFSLayerBase.from_product_catalog(self.product_name, self.api_gw_host)
+        self.mock_product_catalog_cls.assert_called_once_with()
+
+        CFSLayerBase.clear_product_catalog_cache()
+        CFSLayerBase.from_product_catalog(self.product_name, self.api_gw_host)
+        self.assertEqual(2, self.mock_product_catalog_cls.call_count)
+
+    def test_product_catalog_failure_not_cached(self):
+        """Test from_product_catalog tries to load the product catalog again after a failure."""
+        self.mock_product_catalog_cls.side_effect = [ProductCatalogError('unavailable'),
+                                                     self.mock_product_catalog]
+        with self.assertRaises(CFSConfigurationError):
+            CFSLayerBase.from_product_catalog(self.product_name, self.api_gw_host)
+        layer = CFSLayerBase.from_product_catalog(self.product_name, self.api_gw_host)
+        self.assertEqual(self.expected_clone_url, layer.clone_url)
+
     def test_product_unknown_version(self):
         """Test from_product_catalog when unable to find the requested version of the product."""
         pc_err_msg = 'unable to find that version'
@@ -1242,6 +1356,42 @@ class TestCFSV2Configuration(unittest.TestCase):
             config_name, {'layers': layers}, request_params=None
         )
 
+    def test_resolve_branches(self):
+        """Test resolve_branches resolves each branch once for all layers using it"""
+        CFSLayerBase.clear_branch_cache()
+        branch_commits = {'main': 'aaaa1111', 'integration': 'bbbb2222'}
+        mock_vcs_repo_cls = patch('csm_api_client.service.cfs.VCSRepo').start()
+        mock_vcs_repo_cls.return_value.get_commit_hash_for_branch.side_effect = branch_commits.get
+
+        clone_url = self.example_layer_data['cloneUrl']
+        config = CFSV2Configuration.empty(self.mock_cfs_client)
+        config.layers = [
+            CFSV2ConfigurationLayer(clone_url=clone_url, branch='main', playbook='a.yml'),
+            CFSV2ConfigurationLayer(clone_url=clone_url, branch='integration', playbook='b.yml'),
+            CFSV2ConfigurationLayer(clone_url=clone_url, branch='main', playbook='c.yml'),
+            CFSV2ConfigurationLayer(clone_url=clone_url, commit='cccc3333', playbook='d.yml'),
+        ]
+
+        config.resolve_branches()
+
+        self.assertEqual(['aaaa1111', 'bbbb2222', 'aaaa1111', 'cccc3333'],
+                         [layer.commit for layer in config.layers])
+        self.assertTrue(all(layer.branch is None for layer in config.layers))
+        self.assertEqual(2, mock_vcs_repo_cls.return_value.get_commit_hash_for_branch.call_count)
+
+    def test_resolve_branches_failure(self):
+        """Test resolve_branches when a branch does not exist"""
+        CFSLayerBase.clear_branch_cache()
+        mock_vcs_repo_cls = patch('csm_api_client.service.cfs.VCSRepo').start()
+        mock_vcs_repo_cls.return_value.get_commit_hash_for_branch.return_value = None
+
+        config = CFSV2Configuration.empty(self.mock_cfs_client)
+        config.layers = [CFSV2ConfigurationLayer(clone_url=self.example_layer_data['cloneUrl'],
+                                                 branch='missing')]
+
+        with self.assertRaisesRegex(CFSConfigurationError, 'No such branch'):
+            config.resolve_branches()
+
     @patch('csm_api_client.service.cfs.CFSLayerBase.from_cfs')
     def test_construct_cfs_configuration(self, mock_from_cfs):
         """Test the CFSConfiguration constructor."""
@@ -1293,6 +1443,24 @@ class TestCFSV2Configuration(unittest.TestCase):
         self.assertEqual({'layers': [self.example_layer_data]},
                          self.single_layer_config.req_payload)
 
+    def test_req_payload_generated_names_share_timestamp(self):
+        """Test that generated layer names in req_payload all use the same timestamp."""
+        layers = [
+            CFSV2ConfigurationLayer(clone_url=layer_data['cloneUrl'], commit=layer_data['commit'],
+                                    playbook=layer_data['playbook'])
+            for layer_data in (self.example_layer_data, self.new_layer_data)
+        ]
+        config = CFSV2Configuration.empty(self.mock_cfs_client)
+        config.layers = layers
+        times = [datetime.datetime(2024, 8, 25, 11, 11, 11), datetime.datetime(2024, 8, 25, 11, 11, 12)]
+        with patch('csm_api_client.service.cfs.datetime', wraps=datetime.datetime) as mock_datetime:
+            mock_datetime.now.side_effect = times + times
+            layer_names = [layer['name'] for layer in config.req_payload['layers']]
+
+        self.assertEqual(['example-example-config-1234567-20240825T111111',
+                          'new-new-config-fedcba9-20240825T111111'],
+                         layer_names)
+
     @patch('csm_api_client.service.cfs.CFSLayerBase.from_cfs')
     def test_save_to_cfs(self, mock_from_cfs):
         """Test that save_to_cfs properly calls the CFS API."""
@@ -1326,10 +1494,33 @@ class TestCFSV2Configuration(unittest.TestCase):
 
     def test_save_to_cfs_no_overwrite(self):
         """Test preventing overwriting an existing CFS configuration"""
-        self.mock_cfs_client.get.return_value.status_code = 200
+        self.mock_cfs_client.configuration_exists.return_value = True
         config_name = self.single_layer_config_data['name']
         with self.assertRaisesRegex(CFSConfigurationError, 'already exists'):
             self.single_layer_config.save_to_cfs(config_name, overwrite=False)
+        self.mock_cfs_client.configuration_exists.assert_called_once_with(config_name)
+        self.mock_cfs_client.put_configuration.assert_not_called()
+
+    @patch('csm_api_client.service.cfs.CFSLayerBase.from_cfs')
+    def test_save_to_cfs_no_overwrite_not_existing(self, mock_from_cfs):
+        """Test save_to_cfs with overwrite=False when the configuration does not exist"""
+        self.mock_cfs_client.configuration_exists.return_value = False
+        self.mock_cfs_client.put_configuration.return_value = self.single_layer_config_data
+        config_name = self.single_layer_config_data['name']
+        layers = self.single_layer_config_data['layers']
+
+        self.single_layer_config.save_to_cfs(config_name, overwrite=False)
+
+        self.mock_cfs_client.get.assert_not_called()
+        self.assert_put_configuration_called(config_name, layers)
+
+    def test_save_to_cfs_no_overwrite_check_failure(self):
+        """Test save_to_cfs with overwrite=False when checking for the configuration fails"""
+        self.mock_cfs_client.configuration_exists.side_effect = APIError('cfs problem')
+        config_name = self.single_layer_config_data['name']
+        with self.assertRaisesRegex(CFSConfigurationError, 'Failed to check for existing'):
+            self.single_layer_config.save_to_cfs(config_name, overwrite=False)
+        self.mock_cfs_client.put_configuration.assert_not_called()
 
     def test_save_to_cfs_api_failure(self):
         """Test that save_to_cfs raises an exception if CFS API request fails."""
@@ -1505,6 +1696,122 @@ class TestCFSV2Configuration(unittest.TestCase):
         self.assertEqual(layers_before, self.single_layer_config.layers)
         self.assertFalse(self.single_layer_config.changed)
 
+    def test_ensure_layer_no_match_keeps_layers_list(self):
+        """Test that the layers list is not rebuilt when no existing layer matches."""
+        layers_before = self.single_layer_config.layers
+
+        self.single_layer_config.ensure_layer(self.new_layer, state=LayerState.ABSENT)
+        self.assertIs(layers_before, self.single_layer_config.layers)
+
+        self.single_layer_config.ensure_layer(self.new_layer, state=LayerState.PRESENT)
+        self.assertIs(layers_before, self.single_layer_config.layers)
+        self.assertEqual(self.new_layer, layers_before[-1])
+
+
+class TestCFSConfigurationSaveToFile(unittest.TestCase):
+    """Tests for CFSConfigurationBase.save_to_file using the file system."""
+
+    def setUp(self):
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.file_path = os.path.join(self.tmp_dir.name, 'config.json')
+        self.backup_file_path = os.path.join(self.tmp_dir.name, 'config.bak.json')
+        self.old_data = {'name': 'my-config', 'layers': []}
+        with open(self.file_path, 'w') as f:
+            json.dump(self.old_data, f)
+        self.config = CFSV2Configuration(Mock(spec=CFSV2Client),
+                                         {'name': 'my-config', 'layers': [], 'description': 'new'})
+
+    def tearDown(self):
+        self.tmp_dir.cleanup()
+
+    def load(self, file_path):
+        """Load the JSON data from the given file"""
+        with open(file_path) as f:
+            return json.load(f)
+
+    def test_save_to_file_with_backup(self):
+        """Test save_to_file replaces the file and keeps the old contents in the backup"""
+        self.config.save_to_file(self.file_path, backup_suffix='.bak')
+
+        self.assertEqual(self.old_data, self.load(self.backup_file_path))
+        self.assertEqual(self.config.req_payload, self.load(self.file_path))
+        self.assertEqual(['config.bak.json', 'config.json'], sorted(os.listdir(self.tmp_dir.name)))
+
+    def test_save_to_file_replaces_backup(self):
+        """Test save_to_file replaces an existing backup"""
+        with open(self.backup_file_path, 'w') as f:
+            f.write('stale')
+
+        self.config.save_to_file(self.file_path, backup_suffix='.bak')
+
+        self.assertEqual(self.old_data, self.load(self.backup_file_path))
+
+    def test_save_to_file_backup_without_links(self):
+        """Test save_to_file copies the file to the backup when hard links are not supported"""
+        with patch('csm_api_client.service.cfs.os.link', side_effect=PermissionError):
+            self.config.save_to_file(self.file_path, backup_suffix='.bak')
+
+        self.assertEqual(self.old_data, self.load(self.backup_file_path))
+        self.assertEqual(self.config.req_payload, self.load(self.file_path))
+
+    def test_save_to_file_through_symlink(self):
+        """Test save_to_file writes through a symbolic link instead of replacing it"""
+        target_path = os.path.join(self.tmp_dir.name, 'target.json')
+        os.rename(self.file_path, target_path)
+        os.symlink(target_path, self.file_path)
+
+        self.config.save_to_file(self.file_path, backup_suffix='.bak')
+
+        self.assertTrue(os.path.islink(self.file_path))
+        self.assertEqual(self.config.req_payload, self.load(target_path))
+        self.assertEqual(self.old_data, self.load(self.backup_file_path))
+
+    def test_save_to_file_replace_failure(self):
+        """Test save_to_file leaves the file unchanged and no temporary file when replacing fails"""
+        with patch('csm_api_client.service.cfs.os.replace', side_effect=OSError('disk full')):
+            with self.assertRaisesRegex(CFSConfigurationError, 'Failed to write to file .*: disk full'):
+                self.config.save_to_file(self.file_path)
+
+        self.assertEqual(self.old_data, self.load(self.file_path))
+        self.assertEqual(['config.json'], os.listdir(self.tmp_dir.name))
+
+    def test_save_to_file_in_place(self):
+        """Test save_to_file writes in place and copies the backup when no temporary file can be created"""
+        with patch.object(CFSV2Configuration, '_create_replacement_file', return_value=None):
+            self.config.save_to_file(self.file_path, backup_suffix='.bak')
+
+        self.assertEqual(self.old_data, self.load(self.backup_file_path))
+        self.assertEqual(self.config.req_payload, self.load(self.file_path))
+        self.assertEqual(['config.bak.json', 'config.json'], sorted(os.listdir(self.tmp_dir.name)))
+
+    def test_save_to_file_ownership_not_copied(self):
+        """Test save_to_file writes in place when the ownership of the file cannot be copied"""
+        file_inode = os.stat(self.file_path).st_ino
+        with patch('csm_api_client.service.cfs.os.chmod', side_effect=PermissionError):
+            self.config.save_to_file(self.file_path)
+
+        self.assertEqual(file_inode, os.stat(self.file_path).st_ino)
+        self.assertEqual(self.config.req_payload, self.load(self.file_path))
+        self.assertEqual(['config.json'], os.listdir(self.tmp_dir.name))
+
+    @unittest.skipUnless(hasattr(os, 'geteuid') and os.geteuid() == 0, 'requires root to change ownership')
+    def test_save_to_file_keeps_ownership(self):
+        """Test save_to_file keeps the owner and group of the file it replaces"""
+        os.chown(self.file_path, 1234, 5678)
+
+        self.config.save_to_file(self.file_path)
+
+        file_stat = os.stat(self.file_path)
+        self.assertEqual((1234, 5678), (file_stat.st_uid, file_stat.st_gid))
+
+    def test_save_to_file_keeps_mode(self):
+        """Test save_to_file keeps the permissions of the file it replaces"""
+        os.chmod(self.file_path, 0o640)
+
+        self.config.save_to_file(self.file_path)
+
+        self.assertEqual(0o640, stat.S_IMODE(os.stat(self.file_path).st_mode))
+
 
 class TestCFSV3Configuration(unittest.TestCase):
     """Tests for the CFSV3Configuration class.
@@ -1617,6 +1924,185 @@ class TestCFSDebugCommand(unittest.TestCase):
         """Check that no debug message is given if there are no failing containers"""
         self.assertIsNone(self.failed_container([], []))
 
+    def test_no_container_when_unknown_containers_fail(self):
+        """Check that no container is selected when only unknown containers fail"""
+        self.assertIsNone(self.failed_container([], ['istio-proxy', 'other']))
+        self.assertEqual(self.failed_container([], ['istio-proxy', 'teardown']), 'teardown')
+
+
+class TestCFSImageConfigurationSessionStatus(unittest.TestCase):
+    """Tests for the status properties of CFSImageConfigurationSession"""
+
+    def test_status_properties(self):
+        """Test the properties read from the session status"""
+        session = CFSImageConfigurationSession(
+            {'name': 'test_session',
+             'status': {'session': {'status': 'complete', 'succeeded': 'true', 'job': 'cfs-job'},
+                        'artifacts': [{'result_id': 'image-id'}]}},
+            MagicMock(spec=CFSV2Client), 'test_image'
+        )
+        self.assertEqual('complete', session.session_status)
+        self.assertTrue(session.complete)
+        self.assertTrue(session.succeeded)
+        self.assertEqual('cfs-job', session.kube_job)
+        self.assertEqual('image-id', session.resultant_image_id)
+
+    def test_session_has_no_instance_dict(self):
+        """Test that CFSImageConfigurationSession uses __slots__ instead of a __dict__"""
+        session = CFSImageConfigurationSession({'name': 'test_session'},
+                                               MagicMock(spec=CFSV2Client), 'test_image')
+        self.assertFalse(hasattr(session, '__dict__'))
+        self.assertRegex(session._log_header, 'CFS session: test_session *Image: test_image:')
+
+    def test_status_properties_no_status(self):
+        """Test the properties read from the session status before CFS reports a status"""
+        session = CFSImageConfigurationSession({'name': 'test_session', 'status': None},
+                                               MagicMock(spec=CFSV2Client), 'test_image')
+        self.assertEqual('', session.session_status)
+        self.assertEqual('', session.kube_job)
+        self.assertFalse(session.complete)
+        self.assertFalse(session.succeeded)
+        self.assertIsNone(session.resultant_image_id)
+
+    def test_start_time_cfs_v2(self):
+        """Test start_time with the CFS v2 startTime property"""
+        session = CFSImageConfigurationSession(
+            {'name': 'test_session', 'status': {'session': {'startTime': '2024-03-04T05:06:07'}}},
+            MagicMock(spec=CFSV2Client), 'test_image'
+        )
+        self.assertEqual(datetime.datetime(2024, 3, 4, 5, 6, 7), session.start_time)
+
+    def test_start_time_cfs_v3(self):
+        """Test start_time with the CFS v3 start_time property"""
+        session = CFSImageConfigurationSession(
+            {'name': 'test_session', 'status': {'session': {'start_time': '2024-03-04T05:06:07'}}},
+            MagicMock(spec=CFSV3Client), 'test_image'
+        )
+        self.assertEqual(datetime.datetime(2024, 3, 4, 5, 6, 7), session.start_time)
+
+
+class TestCFSUpdateStatuses(unittest.TestCase):
+    """Tests for the update_statuses class method of CFSImageConfigurationSession"""
+
+    def setUp(self):
+        """Create CFSImageConfigurationSessions with mocked statuses"""
+        self.sessions = []
+        for index, status in enumerate(['running', 'pending', 'running']):
+            session = CFSImageConfigurationSession({'name': f'session-{index}'},
+                                                   MagicMock(spec=CFSV2Client), f'image-{index}')
+            session.cfs_client.get_session_if_modified.return_value = ({
+                'status': {'session': {'status': status, 'job': f'cfs-job-{index}'}}
+            }, None)
+            self.sessions.append(session)
+
+        self.pod = MagicMock()
+        self.pod.metadata.labels = {'job-name': 'cfs-job-0'}
+        self.kube_client = MagicMock()
+        self.kube_client.list_namespaced_pod.return_value.items = [self.pod]
+        self.mock_update_container_status = patch.object(
+            CFSImageConfigurationSession, '_update_container_status').start()
+
+    def tearDown(self):
+        patch.stopall()
+
+    def test_update_statuses(self):
+        """Test update_statuses lists the pods of all started sessions at once"""
+        with self.assertLogs(level=logging.INFO) as logs_cm:
+            CFSImageConfigurationSession.update_statuses(self.sessions, self.kube_client)
+
+        self.kube_client.list_namespaced_pod.assert_called_once_with(
+            'services', label_selector='job-name in (cfs-job-0,cfs-job-2)'
+        )
+        self.assertEqual(self.pod, self.sessions[0].pod)
+        self.assertIsNone(self.sessions[1].pod)
+        self.assertIsNone(self.sessions[2].pod)
+        self.mock_update_container_status.assert_called_once_with()
+        self.assertEqual(2, len(logs_cm.records))
+        self.assertIn('Waiting for CFS to create Kubernetes job associated with session session-1',
+                      logs_cm.records[0].message)
+        self.assertIn('Waiting for creation of Kubernetes pod associated with session session-2',
+                      logs_cm.records[1].message)
+
+    def test_update_statuses_all_pending(self):
+        """Test update_statuses does not query Kubernetes when all sessions are pending"""
+        CFSImageConfigurationSession.update_statuses(self.sessions[1:2], self.kube_client)
+        self.kube_client.list_namespaced_pod.assert_not_called()
+
+    def test_update_cfs_status_sends_etag(self):
+        """Test update_cfs_status sends the ETag from the previous query"""
+        session = self.sessions[0]
+        session.cfs_client.get_session_if_modified.return_value = (
+            {'status': {'session': {'status': 'running'}}}, '"v1"'
+        )
+        session.update_cfs_status()
+        session.update_cfs_status()
+
+        self.assertEqual(
+            [call('session-0', None), call('session-0', '"v1"')],
+            session.cfs_client.get_session_if_modified.call_args_list
+        )
+
+    def test_update_cfs_status_missing_status_keeps_etag(self):
+        """Test update_cfs_status does not keep the ETag of a response missing the status"""
+        session = self.sessions[0]
+        session.cfs_client.get_session_if_modified.return_value = ({}, '"v1"')
+
+        with self.assertRaisesRegex(APIError, "'status' key was missing"):
+            session.update_cfs_status()
+        session.cfs_client.get_session_if_modified.return_value = (
+            {'status': {'session': {'status': 'running'}}}, '"v2"'
+        )
+        session.update_cfs_status()
+
+        self.assertEqual(
+            [call('session-0', None), call('session-0', None)],
+            session.cfs_client.get_session_if_modified.call_args_list
+        )
+        self.assertEqual({'session': {'status': 'running'}}, session.data['status'])
+
+    def test_update_cfs_status_not_modified(self):
+        """Test update_cfs_status leaves the status alone when the session has not changed"""
+        session = self.sessions[0]
+        session.data['status'] = {'session': {'status': 'pending'}}
+        session.cfs_client.get_session_if_modified.return_value = (None, '"v1"')
+
+        session.update_cfs_status()
+
+        self.assertEqual({'session': {'status': 'pending'}}, session.data['status'])
+
+    def test_update_statuses_running_without_job(self):
+        """Test update_statuses waits for the job of a running session which has no job yet"""
+        self.sessions[2].cfs_client.get_session_if_modified.return_value = ({
+            'status': {'session': {'status': 'running'}}
+        }, None)
+
+        with self.assertLogs(level=logging.INFO) as logs_cm:
+            CFSImageConfigurationSession.update_statuses(self.sessions, self.kube_client)
+
+        self.kube_client.list_namespaced_pod.assert_called_once_with(
+            'services', label_selector='job-name in (cfs-job-0)'
+        )
+        self.assertIsNone(self.sessions[2].pod)
+        self.assertIn('Waiting for CFS to create Kubernetes job associated with session session-2',
+                      logs_cm.records[1].message)
+
+    def test_update_statuses_no_jobs(self):
+        """Test update_statuses does not query Kubernetes when no started session has a job"""
+        for session in self.sessions:
+            session.cfs_client.get_session_if_modified.return_value = ({
+                'status': {'session': {'status': 'running'}}
+            }, None)
+
+        CFSImageConfigurationSession.update_statuses(self.sessions, self.kube_client)
+
+        self.kube_client.list_namespaced_pod.assert_not_called()
+
+    def test_update_statuses_kube_error(self):
+        """Test update_statuses when listing pods fails"""
+        self.kube_client.list_namespaced_pod.side_effect = ApiException(reason='Unavailable')
+        with self.assertRaisesRegex(APIError, 'Failed to query Kubernetes for pods'):
+            CFSImageConfigurationSession.update_statuses(self.sessions, self.kube_client)
+
 
 class TestCFSUpdateContainerStatus(unittest.TestCase):
     """Tests for the _update_container_status method of CFSImageConfigurationSession"""
@@ -1647,6 +2133,7 @@ class TestCFSUpdateContainerStatus(unittest.TestCase):
         self.container_statuses = [self.inventory_container_status, self.ansible_container_status]
 
         self.session.pod = MagicMock()
+        self.session.pod.metadata.resource_version = '1'
         self.session.pod.status.init_container_statuses = self.init_container_statuses
         self.session.pod.status.container_statuses = self.container_statuses
 
@@ -1674,6 +2161,7 @@ class TestCFSUpdateContainerStatus(unittest.TestCase):
         self.ansible_container_status.state.running = None
         self.ansible_container_status.state.terminated = MagicMock()
         self.ansible_container_status.state.terminated.exit_code = 0
+        self.session.pod.metadata.resource_version = '2'
         # Update container status again
         with self.assertLogs(level=logging.INFO) as logs_cm:
             self.assertIsNone(self.session._update_container_status())
@@ -1687,6 +2175,40 @@ class TestCFSUpdateContainerStatus(unittest.TestCase):
         self.assertRegexpMatches(logs_cm.records[2].message,
                                  'Container ansible *transitioned to succeeded from running')
 
+    def test_update_container_status_unchanged_pod(self):
+        """Test _update_container_status skips a pod whose resource version has not changed"""
+        with self.assertLogs(level=logging.INFO):
+            self.session._update_container_status()
+
+        # Without a new resource version, the container statuses are not read again
+        with patch.object(CFSImageConfigurationSession, 'get_container_status_description') as mock_get_description:
+            self.session._update_container_status()
+        mock_get_description.assert_not_called()
+
+    def test_update_container_status_info_disabled(self):
+        """Test _update_container_status records statuses without formatting messages when INFO is disabled"""
+        with patch('csm_api_client.service.cfs.LOGGER.isEnabledFor', return_value=False), \
+                patch.object(CFSImageConfigurationSession, 'get_container_status_change_msg') as mock_msg:
+            self.session._update_container_status()
+
+        mock_msg.assert_not_called()
+        self.assertEqual({'git-clone': 'succeeded'}, self.session.init_container_status_by_name)
+        self.assertEqual({'inventory': 'running', 'ansible': 'running'},
+                         self.session.container_status_by_name)
+
+    def test_update_container_status_with_none_container_statuses(self):
+        """Test _update_container_status when init containers are reported but containers are not yet"""
+        self.session.pod.status.container_statuses = None
+
+        with self.assertLogs(level=logging.INFO) as logs_cm:
+            self.assertIsNone(self.session._update_container_status())
+
+        self.assertEqual(3, len(logs_cm.records))
+        self.assertRegex(logs_cm.records[1].message, 'Container git-clone transitioned to succeeded')
+        self.assertRegex(logs_cm.records[2].message,
+                         'Waiting for container statuses in pod: container_statuses is None')
+        self.assertEqual({'git-clone': 'succeeded'}, self.session.init_container_status_by_name)
+
     def test_update_container_status_with_none_pod(self):
         """Check that update_container_status returns None when pod is None"""
         self.session.pod = None
@@ -1745,6 +2267,19 @@ class TestCFSClientBase(unittest.TestCase):
         with self.assertRaisesRegex(ValueError, 'Invalid CFS API version'):
             CFSClientBase.get_cfs_client(self.mock_session, 'v4')
 
+    def test_get_valid_session_name(self):
+        """Test get_valid_session_name with a short prefix"""
+        name = CFSClientBase.get_valid_session_name('sat-test')
+        self.assertRegex(name, r'^sat-test-[0-9a-f]{32}$')
+
+    def test_get_valid_session_name_long_prefix(self):
+        """Test get_valid_session_name truncates a long prefix"""
+        with self.assertLogs(level=logging.WARNING) as logs_cm:
+            name = CFSClientBase.get_valid_session_name('a-very-long-prefix')
+        self.assertRegex(name, r'^a-very-long--[0-9a-f]{32}$')
+        self.assertEqual(CFSClientBase.MAX_SESSION_NAME_LENGTH, len(name))
+        self.assertRegex(logs_cm.records[0].message, r'truncated \(18 > 12\)')
+
 class TestCFSV2Client(unittest.TestCase):
     """Tests for the CFSV2Client class"""
 
@@ -1804,6 +2339,209 @@ class TestCFSV2Client(unittest.TestCase):
 
         mock_get.assert_called_once_with('components', params={'configName': config_name})
 
+    def test_configuration_exists(self):
+        """Test configuration_exists requests the configuration when not caching"""
+        cfs_client = CFSV2Client(Mock())
+        for ok, status_code, expected in [(True, 200, True), (False, 404, False)]:
+            with self.subTest(status_code=status_code):
+                with patch.object(cfs_client, 'get') as mock_get:
+                    mock_get.return_value.ok = ok
+                    mock_get.return_value.status_code = status_code
+                    self.assertEqual(expected, cfs_client.configuration_exists('my-config'))
+                mock_get.assert_called_once_with('configurations', 'my-config', raise_not_ok=False)
+
+    def test_get_session_if_modified(self):
+        """Test get_session_if_modified returns the session and its ETag"""
+        cfs_client = CFSV2Client(Mock())
+        session_data = {'name': 'my-session'}
+        with patch.object(cfs_client, 'get') as mock_get:
+            mock_get.return_value.status_code = 200
+            mock_get.return_value.json.return_value = session_data
+            mock_get.return_value.headers = {'ETag': '"v2"'}
+            result = cfs_client.get_session_if_modified('my-session', '"v1"')
+
+        mock_get.assert_called_once_with('sessions', 'my-session',
+                                         headers={'If-None-Match': '"v1"'})
+        self.assertEqual((session_data, '"v2"'), result)
+
+    def test_get_session_if_modified_not_modified(self):
+        """Test get_session_if_modified when CFS responds with 304 Not Modified"""
+        cfs_client = CFSV2Client(Mock())
+        with patch.object(cfs_client, 'get') as mock_get:
+            mock_get.return_value.status_code = 304
+            result = cfs_client.get_session_if_modified('my-session', '"v1"')
+
+        mock_get.return_value.json.assert_not_called()
+        self.assertEqual((None, '"v1"'), result)
+
+    def test_get_session_if_modified_no_etag(self):
+        """Test get_session_if_modified does not send If-None-Match without an ETag"""
+        cfs_client = CFSV2Client(Mock())
+        with patch.object(cfs_client, 'get') as mock_get:
+            mock_get.return_value.status_code = 200
+            mock_get.return_value.json.return_value = {}
+            mock_get.return_value.headers = {}
+            result = cfs_client.get_session_if_modified('my-session')
+
+        mock_get.assert_called_once_with('sessions', 'my-session', headers=None)
+        self.assertEqual(({}, None), result)
+
+    def test_configuration_exists_failure(self):
+        """Test configuration_exists when the request fails with a status other than 404"""
+        cfs_client = CFSV2Client(Mock())
+        with patch.object(cfs_client, 'get') as mock_get, \
+                patch.object(cfs_client, 'raise_from_response', side_effect=APIError('bad')):
+            mock_get.return_value.ok = False
+            mock_get.return_value.status_code = 500
+            with self.assertRaisesRegex(APIError, 'bad'):
+                cfs_client.configuration_exists('my-config')
+
+    def test_configuration_exists_cached(self):
+        """Test configuration_exists lists configurations once when caching"""
+        cfs_client = CFSV2Client(Mock(), cache_ttl=60)
+        with patch.object(cfs_client, 'get') as mock_get:
+            mock_get.return_value.json.return_value = [{'name': 'config-1'}, {'name': 'config-2'}]
+            self.assertTrue(cfs_client.configuration_exists('config-1'))
+            self.assertFalse(cfs_client.configuration_exists('config-3'))
+
+        mock_get.assert_called_once_with('configurations', params=None)
+
+    def test_put_configuration_updates_cached_names(self):
+        """Test put_configuration adds the saved configuration to the cached names"""
+        cfs_client = CFSV2Client(Mock(), cache_ttl=60)
+        with patch.object(cfs_client, 'get') as mock_get, patch.object(cfs_client, 'put'):
+            mock_get.return_value.json.return_value = [{'name': 'config-1'}]
+            self.assertEqual({'config-1'}, cfs_client.get_configuration_names())
+            cfs_client.put_configuration('config-2', {'layers': []})
+            self.assertEqual({'config-1', 'config-2'}, cfs_client.get_configuration_names())
+
+        mock_get.assert_called_once()
+
+    def test_get_configuration_cached(self):
+        """Test get_configuration reuses cached configuration data until it is saved"""
+        cfs_client = CFSV2Client(Mock(), cache_ttl=60)
+        config_data = {'name': 'config-1', 'layers': []}
+        with patch.object(cfs_client, 'get') as mock_get, patch.object(cfs_client, 'put'):
+            mock_get.return_value.json.return_value = config_data
+            first = cfs_client.get_configuration('config-1')
+            second = cfs_client.get_configuration('config-1')
+            self.assertEqual(1, mock_get.call_count)
+            cfs_client.put_configuration('config-1', {'layers': []})
+            cfs_client.get_configuration('config-1')
+
+        self.assertEqual(2, mock_get.call_count)
+        self.assertIsNot(first, second)
+        self.assertIsNot(first.data, second.data)
+        self.assertEqual(config_data, first.data)
+
+    def test_get_configuration_names_missing_name(self):
+        """Test get_configuration_names when a configuration has no name"""
+        cfs_client = CFSV2Client(Mock())
+        with patch.object(cfs_client, 'get') as mock_get:
+            mock_get.return_value.json.return_value = [{'layers': []}]
+            with self.assertRaisesRegex(APIError, "missing 'name' property"):
+                cfs_client.get_configuration_names()
+
+    def test_get_configurations_for_components(self):
+        """Test get_configurations_for_components queries components in chunks"""
+        component_ids = ['x3000c0s1b0n0', 'x3000c0s3b0n0', 'x3000c0s5b0n0']
+        components = self.get_fake_components(component_ids)
+        components[1]['desiredConfig'] = 'other-config'
+        components[2]['desiredConfig'] = ''
+        hsm_client = Mock()
+        hsm_client.get_component_xnames.return_value = component_ids
+        cfs_client = CFSV2Client(Mock())
+        cfs_client.COMPONENT_IDS_CHUNK_SIZE = 2
+
+        components_by_ids = {
+            'x3000c0s1b0n0,x3000c0s3b0n0': components[:2],
+            'x3000c0s5b0n0': components[2:]
+        }
+
+        def fake_get(*args, params):
+            response = Mock()
+            response.json.return_value = components_by_ids[params['ids']]
+            return response
+
+        with patch.object(cfs_client, 'get', side_effect=fake_get) as mock_get, \
+                patch.object(cfs_client, 'get_configuration') as mock_get_configuration:
+            result = cfs_client.get_configurations_for_components(hsm_client, role='Management')
+
+        hsm_client.get_component_xnames.assert_called_once_with(params={'role': 'Management'})
+        mock_get.assert_has_calls([
+            call('components', params={'ids': 'x3000c0s1b0n0,x3000c0s3b0n0'}),
+            call('components', params={'ids': 'x3000c0s5b0n0'})
+        ], any_order=True)
+        self.assertEqual(2, mock_get.call_count)
+        mock_get_configuration.assert_has_calls([call('management-23.11'), call('other-config')],
+                                                any_order=True)
+        self.assertEqual(2, mock_get_configuration.call_count)
+        self.assertEqual([mock_get_configuration.return_value] * 2, result)
+
+    def test_get_configurations_for_components_many_logged(self):
+        """Test get_configurations_for_components logs a sample of many component IDs"""
+        component_ids = [f'x3000c0s{slot}b0n0' for slot in range(12)]
+        hsm_client = Mock()
+        hsm_client.get_component_xnames.return_value = component_ids
+        cfs_client = CFSV2Client(Mock())
+
+        with patch.object(cfs_client, 'get') as mock_get:
+            mock_get.return_value.json.return_value = []
+            with self.assertLogs(level=logging.INFO) as logs_cm:
+                cfs_client.get_configurations_for_components(hsm_client)
+
+        self.assertEqual(
+            'Querying CFS configurations for 12 components, including: '
+            f'{", ".join(component_ids[:10])}',
+            logs_cm.records[0].message
+        )
+
+    def test_get_configurations_for_components_api_error(self):
+        """Test get_configurations_for_components skips a chunk of components that fails"""
+        component_ids = ['x3000c0s1b0n0', 'x3000c0s3b0n0']
+        hsm_client = Mock()
+        hsm_client.get_component_xnames.return_value = component_ids
+        cfs_client = CFSV2Client(Mock())
+
+        with patch.object(cfs_client, 'get', side_effect=APIError('CFS down')), \
+                patch.object(cfs_client, 'get_configuration') as mock_get_configuration:
+            with self.assertLogs(level=logging.WARNING) as logs_cm:
+                result = cfs_client.get_configurations_for_components(hsm_client)
+
+        self.assertEqual([], result)
+        mock_get_configuration.assert_not_called()
+        self.assertEqual(1, len(logs_cm.records))
+        self.assertEqual('Could not retrieve CFS configurations for 2 of 2 components '
+                         '(x3000c0s1b0n0, x3000c0s3b0n0): Failed to get CFS components: CFS down',
+                         logs_cm.records[0].message)
+
+    def test_get_configurations_for_components_partial_failure(self):
+        """Test get_configurations_for_components logs one warning for all failed chunks"""
+        component_ids = ['x3000c0s1b0n0', 'x3000c0s3b0n0', 'x3000c0s5b0n0']
+        hsm_client = Mock()
+        hsm_client.get_component_xnames.return_value = component_ids
+        cfs_client = CFSV2Client(Mock())
+        cfs_client.COMPONENT_IDS_CHUNK_SIZE = 1
+
+        def fake_get(*args, params):
+            if params['ids'] == 'x3000c0s3b0n0':
+                response = Mock()
+                response.json.return_value = self.get_fake_components(['x3000c0s3b0n0'])
+                return response
+            raise APIError('CFS down')
+
+        with patch.object(cfs_client, 'get', side_effect=fake_get), \
+                patch.object(cfs_client, 'get_configuration') as mock_get_configuration:
+            with self.assertLogs(level=logging.WARNING) as logs_cm:
+                result = cfs_client.get_configurations_for_components(hsm_client)
+
+        mock_get_configuration.assert_called_once_with('management-23.11')
+        self.assertEqual([mock_get_configuration.return_value], result)
+        self.assertEqual(1, len(logs_cm.records))
+        self.assertEqual('Could not retrieve CFS configurations for 2 of 3 components '
+                         '(x3000c0s1b0n0, x3000c0s5b0n0): Failed to get CFS components: CFS down',
+                         logs_cm.records[0].message)
+
     def test_update_component_no_changes(self):
         """Test update_component with no changes requested"""
         cfs_client = CFSV2Client(Mock())
@@ -24,13 +24,15 @@
 """
 Unit tests for csm_api_client.service.gateway
 """
+import socket
 from unittest import mock
 import unittest
 
 import requests
+from requests.adapters import HTTPAdapter
 
-from csm_api_client.session import Session
-from csm_api_client.service.gateway import APIError, APIGatewayClient
+from csm_api_client.session import MAX_RETRIES, Session
+from csm_api_client.service.gateway import APIError, APIGatewayClient, ReadTimeout
 
 
 def get_http_url_prefix(hostname):
@@ -94,6 +96,44 @@ class TestAPIGatewayClient(unittest.TestCase):
             params=None, timeout=None
         )
 
+    def test_make_req_invalid_req_type(self):
+        """Test that _make_req raises a ValueError for an unknown request type"""
+        client = self.tst_client_cls(self.mock_session)
+        with self.assertRaisesRegex(ValueError, "Request type 'HEAD' is invalid"):
+            client._make_req(req_type='HEAD')
+
+    def test_stream(self):
+        """Test stream method."""
+        client = APIGatewayClient(self.mock_session, timeout=60)
+        params = {'follow': True}
+        response = client.stream('logs', params=params)
+
+        self.mock_session.session.get.assert_called_once_with(
+            get_http_url_prefix(self.api_gw_host) + 'logs',
+            params=params, stream=True, timeout=60
+        )
+        self.assertEqual(response, self.mock_session.session.get.return_value)
+
+    def test_stream_read_timeout(self):
+        """Test stream raises ReadTimeout when the server does not respond in time."""
+        # A listening socket which never accepts the connection, so no response is sent
+        server = socket.socket()
+        self.addCleanup(server.close)
+        server.bind(('127.0.0.1', 0))
+        server.listen(1)
+        port = server.getsockname()[1]
+
+        http_session = requests.Session()
+        self.addCleanup(http_session.close)
+        http_session.mount('http://', HTTPAdapter(max_retries=MAX_RETRIES))
+        self.mock_session.session = http_session
+
+        client = APIGatewayClient(self.mock_session, timeout=0.2)
+        with mock.patch.object(APIGatewayClient, '_url_prefix', new_callable=mock.PropertyMock,
+                               return_value=f'http://127.0.0.1:{port}'):
+            with self.assertRaises(ReadTimeout):
+                client.stream('logs')
+
     def test_get_no_params(self):
         """Test get method with no additional params."""
         client = APIGatewayClient(self.mock_session, timeout=60)
@@ -120,6 +160,20 @@ class TestAPIGatewayClient(unittest.TestCase):
         )
         self.assertEqual(response, self.mock_session.session.get.return_value)
 
+    def test_get_with_headers(self):
+        """Test get method with additional headers."""
+
+        client = APIGatewayClient(self.mock_session, timeout=60)
+        path_components = ['People']
+        headers = {'If-None-Match': '"abc"'}
+        response = client.get(*path_components, headers=headers)
+
+        self.mock_session.session.get.assert_called_once_with(
+            get_http_url_prefix(self.api_gw_host) + '/'.join(path_components),
+            params=None, headers=headers, timeout=60
+        )
+        self.assertEqual(response, self.mock_session.session.get.return_value)
+
     def test_get_exception(self):
         """Test get method with exception during GET."""
         client = APIGatewayClient(self.mock_session)
@@ -128,6 +182,100 @@ class TestAPIGatewayClient(unittest.TestCase):
         with self.assertRaises(APIError):
             client.get(*path_components)
 
+    def test_map_concurrently(self):
+        """Test map_concurrently returns results in the order of the items."""
+        client = APIGatewayClient(self.mock_session)
+        items = list(range(40))
+        self.assertEqual([item * 2 for item in items],
+                         client.map_concurrently(lambda item: item * 2, items))
+
+    def test_map_concurrently_exception(self):
+        """Test map_concurrently raises an exception raised by the function."""
+        client = APIGatewayClient(self.mock_session)
+
+        def fail_on_odd(item):
+            if item % 2:
+                raise APIError(f'failed on {item}')
+            return item
+
+        with self.assertRaisesRegex(APIError, 'failed on 1'):
+            client.map_concurrently(fail_on_odd, range(4))
+
+    def test_map_concurrently_no_items(self):
+        """Test map_concurrently with no items."""
+        client = APIGatewayClient(self.mock_session)
+        self.assertEqual([], client.map_concurrently(lambda item: item, []))
+
+    def test_get_cached_no_cache_ttl(self):
+        """Test get_cached makes a request every time when no cache_ttl is set."""
+        client = APIGatewayClient(self.mock_session)
+        for _ in range(2):
+            data = client.get_cached('foo', params={'name': 'ryan'})
+            self.assertEqual(data, self.mock_session.session.get.return_value.json.return_value)
+        self.assertEqual(self.mock_session.session.get.call_count, 2)
+
+    def test_get_cached_with_cache_ttl(self):
+        """Test get_cached makes a single request for repeated GETs within cache_ttl."""
+        client = APIGatewayClient(self.mock_session, cache_ttl=60)
+        for _ in range(2):
+            data = client.get_cached('foo', params={'type': ['a', 'b']})
+            self.assertEqual(data, self.mock_session.session.get.return_value.json.return_value)
+        self.mock_session.session.get.assert_called_once_with(
+            get_http_url_prefix(self.api_gw_host) + 'foo',
+            params={'type': ['a', 'b']}, timeout=None
+        )
+
+    def test_get_cached_different_params(self):
+        """Test get_cached caches responses separately for different params."""
+        client = APIGatewayClient(self.mock_session, cache_ttl=60)
+        client.get_cached('foo', params={'name': 'ryan'})
+        client.get_cached('foo', params={'name': 'eli'})
+        client.get_cached('foo')
+        self.assertEqual(self.mock_session.session.get.call_count, 3)
+
+    def test_get_cached_expired(self):
+        """Test get_cached makes a new request once cache_ttl has passed."""
+        client = APIGatewayClient(self.mock_session, cache_ttl=60)
+        with mock.patch('csm_api_client.service.gateway.time.monotonic', side_effect=[0, 61, 61]):
+            client.get_cached('foo')
+            client.get_cached('foo')
+        self.assertEqual(self.mock_session.session.get.call_count, 2)
+
+    def test_invalidate_cache(self):
+        """Test invalidate_cache causes get_cached to make a new request."""
+        client = APIGatewayClient(self.mock_session, cache_ttl=60)
+        client.get_cached('foo')
+        client.invalidate_cache()
+        client.get_cached('foo')
+        self.assertEqual(self.mock_session.session.get.call_count, 2)
+
+    def test_invalidate_cached(self):
+        """Test invalidate_cached only discards the response to the given request."""
+        client = APIGatewayClient(self.mock_session, cache_ttl=60)
+        client.get_cached('foo', params={'type': ['a', 'b']})
+        client.get_cached('bar')
+        client.invalidate_cached('foo', params={'type': ['a', 'b']})
+        client.get_cached('foo', params={'type': ['a', 'b']})
+        client.get_cached('bar')
+        self.assertEqual(self.mock_session.session.get.call_count, 3)
+
+    def test_update_cached(self):
+        """Test _update_cached updates a cached value without reloading it."""
+        client = APIGatewayClient(self.mock_session, cache_ttl=60)
+        load = mock.Mock(return_value={'a'})
+        client._cached('key', load)
+        client._update_cached('key', lambda names: names | {'b'})
+        self.assertEqual({'a', 'b'}, client._cached('key', load))
+        load.assert_called_once_with()
+
+    def test_update_cached_missing(self):
+        """Test _update_cached does nothing when no value is cached."""
+        client = APIGatewayClient(self.mock_session, cache_ttl=60)
+        update = mock.Mock()
+        client._update_cached('key', update)
+        update.assert_not_called()
+        self.assertEqual('loaded', client._cached('key', lambda: 'loaded'))
+
     def test_post(self):
         """Test post method."""
         client = APIGatewayClient(self.mock_session, timeout=60)
@@ -62,15 +62,42 @@ class TestHSMClient(unittest.TestCase):
         params = {'type': 'Node', 'role': 'Compute'}
         result = self.hsm_client.get_component_xnames(params)
         self.mock_get.assert_called_once_with('State', 'Components',
-                                              params=params)
+                                              params={**params, 'stateonly': 'true'})
+        self.assertEqual(self.xnames[0:2], result)
+
+    def test_get_component_xnames_state_param(self):
+        """Test get_component_xnames does not override a state given in params"""
+        params = {'type': 'Node', 'state': 'Ready'}
+        self.hsm_client.get_component_xnames(params)
+        self.mock_get.assert_called_once_with('State', 'Components',
+                                              params={**params, 'stateonly': 'true'})
+
+    def test_get_component_xnames_no_params(self):
+        """Test get_component_xnames only requests component state when no params are given"""
+        result = self.hsm_client.get_component_xnames()
+        self.mock_get.assert_called_once_with('State', 'Components',
+                                              params={'stateonly': 'true'})
         self.assertEqual(self.xnames[0:2], result)
 
+    def test_get_component_xnames_other_state(self):
+        """Test get_component_xnames keeps components in any state other than Empty"""
+        self.components[2]['State'] = 'SomeNewState'
+        result = self.hsm_client.get_component_xnames()
+        self.assertEqual(self.xnames[0:3], result)
+
+    def test_get_component_xnames_api_error(self):
+        """Test an API error message from get_component_xnames includes the params"""
+        self.mock_get.side_effect = APIError('HSM failed')
+        err_regex = 'Failed to get components with type=Node, role=Compute.: HSM failed'
+        with self.assertRaisesRegex(APIError, err_regex):
+            self.hsm_client.get_component_xnames({'type': 'Node', 'role': 'Compute'})
+
     def test_get_components_xnames_with_empty(self):
         """Test get_component_xnames with omit_empty=False"""
         params = {'type': 'Node', 'role': 'Compute'}
         result = self.hsm_client.get_component_xnames(params, omit_empty=False)
         self.mock_get.assert_called_once_with('State', 'Components',
-                                              params=params)
+                                              params={**params, 'stateonly': 'true'})
         self.assertEqual(self.xnames, result)
 
     def test_get_node_components_success(self):
@@ -82,6 +109,18 @@ class TestHSMClient(unittest.TestCase):
         self.assertEqual(result, [{'ID': xname, 'State': state}
                                   for xname, state in zip(self.xnames, self.states)])
 
+    def test_get_node_components_cached_result_not_shared(self):
+        """Test modifying a cached result of get_node_components does not affect later calls"""
+        hsm_client = HSMClient(self.mock_session, cache_ttl=60)
+        expected = [{'ID': xname, 'State': state} for xname, state in zip(self.xnames, self.states)]
+
+        first_result = hsm_client.get_node_components()
+        first_result[0]['State'] = 'Off'
+        first_result.append({'ID': 'x1000c0s2b0n0', 'State': 'On'})
+
+        self.assertEqual(expected, hsm_client.get_node_components())
+        self.mock_get.assert_called_once()
+
     def test_get_node_components_api_error(self):
         """Test an API error is handled by get_node_components"""
         params = {'type': 'Node'}
@@ -182,23 +221,17 @@ class TestHSMClientRedfishEndpoints(ExtendedTestCase):
         self.assertEqual(expected_xnames, actual_xnames)
 
     def test_get_all_bmc_xnames_with_two_types(self):
-        """Test getting BMCs with two types queries HSM once per type."""
-        # Force the fake BMCs returned to exclude RouterBMC xnames. Here the type filtering
+        """Test getting BMCs with two types queries HSM once for both types."""
+        # Force the fake BMCs returned to exclude NodeBMC xnames. Here the type filtering
         # is actually done by the HSM API and mocking the behavior doesn't affect the test,
         # which is asserting that we called HSM correctly and returned what HSM gave us.
-        chassis_response = mock.Mock()
-        chassis_response.json.return_value = {
+        self.mock_get.return_value.json.return_value = {
             'RedfishEndpoints': [
                 {
                     'ID': 'x1000c0b0',
                     'Enabled': True,
                     'DiscoveryInfo': {'LastDiscoveryStatus': 'DiscoverOK'}
-                }
-            ]
-        }
-        router_response = mock.Mock()
-        router_response.json.return_value = {
-            'RedfishEndpoints': [
+                },
                 {
                     'ID': 'x1000c0r1b0',
                     'Enabled': True,
@@ -207,20 +240,10 @@ class TestHSMClientRedfishEndpoints(ExtendedTestCase):
             ]
         }
 
-        def _fake_get(*_, params):
-            if params.get('type') == 'ChassisBMC':
-                return chassis_response
-            return router_response
-        self.mock_get.side_effect = _fake_get
-
         expected_xnames = {'x1000c0b0', 'x1000c0r1b0'}
         actual_xnames = self.hsm_client.get_and_filter_bmcs(bmc_types=('ChassisBMC', 'RouterBMC'))
-        self.assertEqual(
-            self.mock_get.call_args_list,
-            [
-                mock.call('Inventory', 'RedfishEndpoints', params={'type': 'ChassisBMC'}),
-                mock.call('Inventory', 'RedfishEndpoints', params={'type': 'RouterBMC'})
-            ]
+        self.mock_get.assert_called_once_with(
+            'Inventory', 'RedfishEndpoints', params={'type': ['ChassisBMC', 'RouterBMC']}
         )
         self.assertEqual(expected_xnames, actual_xnames)
 
@@ -341,5 +364,53 @@ class TestHSMClientRedfishEndpoints(ExtendedTestCase):
         )
 
 
+class TestHSMClientComponentHistory(unittest.TestCase):
+    """Tests for HSMClient functions that get component history."""
+
+    def setUp(self):
+        self.mock_session = mock.MagicMock(autospec=Session)
+        self.hsm_client = HSMClient(self.mock_session)
+        self.history_by_id = {
+            'x3000c0s1b0n0': [{'ID': 'x3000c0s1b0n0', 'History': [{'EventType': 'Added'}]}],
+            'x3000c0s2b0n0': [{'ID': 'x3000c0s2b0n0', 'History': [{'EventType': 'Removed'}]}],
+        }
+
+        def fake_get_history_by_id(cid, by_fru):
+            if cid == 'not-an-xname':
+                raise APIError('HSM returned 400')
+            return self.history_by_id.get(cid)
+
+        self.mock_get_history_by_id = mock.patch.object(
+            HSMClient, 'get_component_history_by_id', side_effect=fake_get_history_by_id
+        ).start()
+
+    def tearDown(self):
+        mock.patch.stopall()
+
+    def test_get_component_history_no_cids(self):
+        """Test getting component history for all components makes a single request"""
+        self.history_by_id[None] = self.history_by_id['x3000c0s1b0n0'] + self.history_by_id['x3000c0s2b0n0']
+        history = self.hsm_client.get_component_history()
+        self.mock_get_history_by_id.assert_called_once_with(None, False)
+        self.assertEqual(self.history_by_id[None], history)
+
+    def test_get_component_history_multiple_cids(self):
+        """Test getting component history for multiple cids combines the results"""
+        cids = {'x3000c0s1b0n0', 'x3000c0s2b0n0', 'x3000c0s3b0n0'}
+        history = self.hsm_client.get_component_history(cids)
+        self.assertEqual(3, self.mock_get_history_by_id.call_count)
+        self.assertCountEqual(
+            self.history_by_id['x3000c0s1b0n0'] + self.history_by_id['x3000c0s2b0n0'],
+            history
+        )
+
+    def test_get_component_history_api_error(self):
+        """Test getting component history skips cids that result in an APIError"""
+        with self.assertLogs(level=logging.DEBUG) as logs:
+            history = self.hsm_client.get_component_history({'not-an-xname', 'x3000c0s1b0n0'})
+        self.assertEqual(self.history_by_id['x3000c0s1b0n0'], history)
+        self.assertIn('HSM API error for not-an-xname: HSM returned 400', logs.output[0])
+
+
 if __name__ == '__main__':
     unittest.main()
@@ -43,6 +43,7 @@ class TestLoadKubeApi(unittest.TestCase):
             patch('csm_api_client.k8s.load_kube_config').start()
 
         self.mock_k8s_api_cls = MagicMock()
+        patch.dict('csm_api_client.k8s._KUBE_API_CACHE', clear=True).start()
 
     def tearDown(self) -> None:
         patch.stopall()
@@ -79,3 +80,45 @@ class TestLoadKubeApi(unittest.TestCase):
             with self.assertRaises(ConfigException):
                 load_kube_api(api_cls=self.mock_k8s_api_cls)
             self.mock_k8s_api_cls.assert_not_called()
+
+    def test_api_object_cached(self):
+        """Test that the API object is cached and the config is only loaded once"""
+        first_api = load_kube_api(api_cls=self.mock_k8s_api_cls)
+        second_api = load_kube_api(api_cls=self.mock_k8s_api_cls)
+        self.assertIs(first_api, second_api)
+        self.mock_k8s_api_cls.assert_called_once()
+        self.mock_k8s_incluster_config.assert_called_once()
+
+    def test_api_object_cached_by_kwargs(self):
+        """Test that API objects constructed with different kwargs are cached separately"""
+        load_kube_api(api_cls=self.mock_k8s_api_cls, api_client='client1')
+        load_kube_api(api_cls=self.mock_k8s_api_cls, api_client='client2')
+        load_kube_api(api_cls=self.mock_k8s_api_cls, api_client='client1')
+        self.assertEqual(2, self.mock_k8s_api_cls.call_count)
+
+    def test_api_object_unhashable_kwargs(self):
+        """Test that API objects constructed with unhashable kwargs are not cached"""
+        first_api = load_kube_api(api_cls=self.mock_k8s_api_cls, headers={'a': 'b'})
+        load_kube_api(api_cls=self.mock_k8s_api_cls, headers={'a': 'b'})
+        self.assertEqual(first_api, self.mock_k8s_api_cls.return_value)
+        self.assertEqual(2, self.mock_k8s_api_cls.call_count)
+        self.mock_k8s_api_cls.assert_called_with(headers={'a': 'b'})
+        self.assertEqual(2, self.mock_k8s_incluster_config.call_count)
+
+    def test_force_reload(self):
+        """Test that force_reload loads the config and constructs a new API object"""
+        load_kube_api(api_cls=self.mock_k8s_api_cls)
+        load_kube_api(api_cls=self.mock_k8s_api_cls, force_reload=True)
+        self.assertEqual(2, self.mock_k8s_api_cls.call_count)
+        self.assertEqual(2, self.mock_k8s_incluster_config.call_count)
+
+    def test_failure_not_cached(self):
+        """Test that a failure to load the config is not cached"""
+        self.mock_k8s_incluster_config.side_effect = ConfigException
+        self.mock_k8s_config_from_disk.side_effect = ConfigException
+        with self.assertRaises(ConfigException):
+            load_kube_api(api_cls=self.mock_k8s_api_cls)
+
+        self.mock_k8s_config_from_disk.side_effect = None
+        load_kube_api(api_cls=self.mock_k8s_api_cls)
+        self.mock_k8s_api_cls.assert_called_once()
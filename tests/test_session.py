@@ -26,9 +26,10 @@ import base64
 import unittest
 from unittest.mock import patch, MagicMock
 
+from requests.adapters import HTTPAdapter
 import requests_oauthlib
 
-from csm_api_client.session import AdminSession, UserSession
+from csm_api_client.session import AdminSession, POOL_MAXSIZE, UserSession
 
 
 class TestSession(unittest.TestCase):
@@ -86,6 +87,27 @@ class TestSession(unittest.TestCase):
         self.assertEqual(session.token_filename, self.token_filename)
         self.assertEqual(session.session.verify, self.cert_verify)
 
+    def test_session_mounts_pooled_adapter(self):
+        """Test that a connection-pooling HTTPS adapter is mounted on the session"""
+        UserSession(
+            self.host,
+            cert_verify=self.cert_verify,
+            username=self.user,
+            token_filename=self.token_filename
+        )
+
+        self.mock_session.mount.assert_called_once()
+        prefix, adapter = self.mock_session.mount.call_args.args
+        self.assertEqual(prefix, 'https://')
+        self.assertIsInstance(adapter, HTTPAdapter)
+        self.assertEqual(adapter._pool_maxsize, POOL_MAXSIZE)
+        self.assertEqual(adapter.max_retries.status, 3)
+        # Read timeouts and connection errors must not be retried
+        self.assertIs(adapter.max_retries.read, False)
+        self.assertEqual(adapter.max_retries.connect, 0)
+        # Retry-After headers must not block requests beyond the backoff
+        self.assertFalse(adapter.max_retries.respect_retry_after_header)
+
     def test_token_not_none_when_fetched(self):
         """Test that the token can be fetched"""
         session = UserSession(
@@ -24,7 +24,7 @@
 
 import unittest
 
-from csm_api_client.util import pop_val_by_path, strip_suffix
+from csm_api_client.util import pop_val_by_path, set_val_by_path, strip_suffix
 
 
 class TestPopValByPath(unittest.TestCase):
@@ -96,6 +96,28 @@ class TestPopValByPath(unittest.TestCase):
             pop_val_by_path(mapping, '')
 
 
+class TestSetValByPath(unittest.TestCase):
+    """Tests for the set_val_by_path function."""
+
+    def test_set_val_by_path_flat(self):
+        """Test that the function can set a value by a flat path."""
+        mapping = {'foo': 'bar'}
+        set_val_by_path(mapping, 'foo', 'baz')
+        self.assertEqual(mapping, {'foo': 'baz'})
+
+    def test_set_val_by_path_dotted_path(self):
+        """Test that the function creates and replaces nested dicts along a dotted path."""
+        mapping = {'foo': 'bar', 'qux': {'quux': 'corge'}}
+        set_val_by_path(mapping, 'foo.bar', 'baz')
+        set_val_by_path(mapping, 'qux.grault', 'garply')
+        self.assertEqual(mapping, {'foo': {'bar': 'baz'}, 'qux': {'quux': 'corge', 'grault': 'garply'}})
+
+    def test_set_val_by_path_empty_path(self):
+        """Test that the function raises an error when the path is empty."""
+        with self.assertRaises(ValueError):
+            set_val_by_path({}, '', 'value')
+
+
 class TestStripSuffix(unittest.TestCase):
     """Tests for the strip_suffix function."""
 